@@ -1,10 +1,21 @@
 import os
 import time
-import pandas as pd
+import hashlib
 from flask import (
-    Flask, render_template_string, request, send_file, flash,
-    send_from_directory, jsonify, redirect, url_for
+    Flask, render_template, request, send_file, flash,
+    send_from_directory, jsonify, redirect, url_for, Response
 )
+from jinja2 import DictLoader
+from catalog import stage_upload, delete_workbook
+from branches import Branch, Branches, parse_branches, ALL as ALL_BRANCHES
+from search_engine import SEARCH_COLUMNS, MATCH_FUZZY
+from images import ImageStore
+from export import EXPORT_FORMATS, export_columns, iter_export
+from search_log import SearchLog
+from serving import BoundedExecutor, Busy
+import serving
+import metrics
+import compress
 
 # ===================== 설정 (환경변수 우선) =====================
 SECRET_KEY = os.environ.get("SECRET_KEY", "change_me")
@@ -14,14 +25,28 @@ ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "change_me")
 # 유료 + 디스크: /data/books_files
 BOOKS_DIR = os.environ.get("BOOKS_DIR", "/opt/render/project/src/books_files")
 os.makedirs(BOOKS_DIR, exist_ok=True)
+# 지점 목록 "id=이름,..." (branches.py). 첫 지점은 BOOKS_DIR 자체를 쓴다.
+BRANCHES = os.environ.get("BRANCHES", "")
+# 검색 기록 (search_log.py). SEARCH_LOG=0 이면 남기지 않는다.
+SEARCH_LOG = os.environ.get("SEARCH_LOG", "1") != "0"
+SEARCH_LOG_DIR = os.environ.get("SEARCH_LOG_DIR", os.path.join(BOOKS_DIR, ".search-log"))
 
 IMAGE_BASENAME = "uploaded_img"  # uploaded_img.jpg / uploaded_img.png
 ALLOWED_XLSX = {".xlsx"}
 ALLOWED_IMG = {".jpg", ".jpeg", ".png"}
 
+PAGE_SIZE = 50        # 검색 화면/API 한 페이지 행 수
+MAX_PAGE_SIZE = 200   # API limit 상한
+SUGGEST_SIZE = 8      # 자동완성 기본 개수
+MAX_SUGGEST_SIZE = 20
+RESULT_CACHE_BYTES = int(os.environ.get("RESULT_CACHE_BYTES", 16 * 1024 * 1024))  # 검색 결과 캐시 예산
+RESULT_CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL", 600))  # 초
+
 # ===================== Flask =====================
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
+metrics.init_app(app)
+compress.init_app(app)
 app.config["MAX_CONTENT_LENGTH"] = 20 * 1024 * 1024  # 20MB
 
 # ===================== 템플릿 =====================
@@ -31,197 +56,8 @@ index_html = r'''
 <head>
   <meta charset="UTF-8">
   <title>만화카페 도도 도서검색</title>
-  <style>
-    :root{
-      /* 레이아웃 기본값 */
-      --gap: clamp(14px, 2.6vw, 32px);
-      --pad: clamp(16px, 3.2vw, 44px);
-      --radius: clamp(16px, 3vw, 40px);
-
-      /* 데스크톱 페이지 가로 폭: 80vw (≈ 20% 축소), 상한을 걸고 싶으면 min(80vw, 1400px) */
-      --page-width: min(80vw, 1400px);
-
-      /* 상하 여백 */
-      --page-vmargin: clamp(10px, 3.4vh, 28px);
-
-      /* 높이 기준 */
-      --img-h: clamp(340px, 47vh, 640px);
-
-      --h1: clamp(1.8rem, 2.6vw, 2.5rem);
-      --text: clamp(1.04rem, 1.15vw, 1.18rem);
-      --btn-fz: clamp(1.02rem, 1.15vw, 1.2rem);
-      --btn-py: clamp(10px, 1.3vw, 16px);
-      --btn-px: clamp(20px, 2.2vw, 38px);
-      --input-fz: clamp(1.05rem, 1.2vw, 1.22rem);
-      --input-pd: clamp(10px, 1.4vw, 16px);
-      --max-input: 680px;
-    }
-
-    body{
-      background:linear-gradient(135deg,#e0f7fa 60%,#f8bbd0 100%);
-      font-family:'Noto Sans KR',sans-serif;
-      margin:0; min-height:100vh;
-    }
-    .flex-wrap{
-      display:flex; justify-content:center; align-items:stretch;
-      width: var(--page-width);                  /* 데스크톱 기본: 80vw */
-      margin:var(--page-vmargin) auto;
-      gap:var(--gap);
-    }
-
-    /* 높이(검색 전에도 충분히 크게 보이도록): 83vh 기준 */
-    .container{
-      padding:var(--pad);
-      min-height: max(var(--img-h), calc(83vh - (var(--page-vmargin) * 2)));
-      padding-bottom: var(--pad); /* 하단 버튼 공간 */
-
-      border-radius:var(--radius); background:white;
-      box-shadow:0 10px 56px #b2dfdb80; text-align:center;
-      border:2px solid #00bfae20; display:flex; flex-direction:column;
-    }
-    .imgbox{
-      background:rgba(255,255,255,0.90); border-radius:var(--radius);
-      box-shadow:0 10px 56px #b2dfdb30; display:flex; align-items:center; justify-content:center;
-      padding:22px 18px; margin:0;
-      min-height: max(var(--img-h), calc(83vh - (var(--page-vmargin) * 2)));
-    }
-.imgbox img {
-    width: 90%;
-    height: 90%;
-    object-fit: cover; /* 비율 유지하며 꽉 채움, 일부 잘릴 수 있음 */
-    border-radius: 32px;
-    box-shadow: 0 2px 18px #b2dfdb40;
-}
-    h1{ color:#00695c; font-size:var(--h1); font-weight:bold; margin-bottom:16px; letter-spacing:-1px; }
-
-    /* 폼/입력 중앙 정렬 */
-    form{
-      margin-bottom:10px;
-      display:flex; flex-direction:column; align-items:center; gap:10px;
-    }
-    input[type="text"]{
-      display:block;
-      width:min(var(--max-input), 96%);
-      max-width:var(--max-input);
-      margin:0 auto;
-      font-size:var(--input-fz);
-      padding:var(--input-pd);
-      border-radius:16px;
-      border:1.8px solid #b2dfdb;
-      box-sizing:border-box;
-      text-align:left;
-    }
-    button{
-      padding:var(--btn-py) var(--btn-px);
-      margin:10px; border-radius:18px; background:#00bfae; color:white; border:none;
-      cursor:pointer; font-weight:bold; font-size:var(--btn-fz);
-      transition:0.18s; box-shadow:0 2px 12px #00bfae20;
-      align-self:center;
-    }
-    button:hover{ background:#00acc1; }
-    .result-box{ margin-top:22px;}
-    table{
-      width:100%; border-collapse:separate; border-spacing:0 10px;
-      font-size:var(--text);
-    }
-    th, td{
-      border:1.8px solid #b2dfdb; padding:12px 12px; border-radius:14px; background:white;
-    }
-    th{ background:#00bfae; color:white; font-weight:700; }
-    tr:nth-child(even) td{ background:#f0f5f5; }
-
-    /* 하단 링크: 흰 배경 내부 거의 바닥 */
-    .container-footer{
-      margin-top:auto;
-      padding-top:16px;
-    }
-    .linklike{
-      background:none; border:none; color:#00bfae; cursor:pointer;
-      text-decoration:underline; font-weight:600; font-size:1rem; font-family:inherit;
-      padding:0; transition:none;
-      text-shadow:none; box-shadow:none; outline:none; -webkit-tap-highlight-color: transparent;
-      filter:none; transform:none;
-    }
-    .linklike:hover{
-      background:none !important; color:#00bfae; text-decoration:underline;
-      text-shadow:none; box-shadow:none; filter:none; transform:none;
-    }
-
-    /* ===== 데스크톱: 좌우 정확히 5:5 (그대로 유지) ===== */
-    @media (min-width: 901px){
-      .flex-wrap{
-        flex-direction: row;     
-        flex-wrap: nowrap;       
-      }
-      .container,
-      .imgbox{
-        flex: 0 0 50%;   /* 50% 고정 */
-        width: 50%;
-        min-width: 0;
-        max-width: none;
-      }
-    }
-
-    /* ===== 모바일 & 포트레이트(세로)에서: 위/아래 스택 + 보기 좋은 높이 ===== */
-    /* 1) 전형적 모바일 너비 */
-    @media (max-width: 900px){
-      .flex-wrap{
-        flex-direction:column; 
-        align-items:center; 
-        gap: 14px; 
-        margin: 8px auto;
-        width: min(94vw, 680px);   /* 모바일은 약간 더 좁게 */
-      }
-      .container, .imgbox{ width: 100%; flex: 1 1 auto; }
-
-      /* 보기 좋은 평균 높이: 합쳐도 1 스크린 남짓 */
-      .container{
-        min-height: clamp(360px, 52svh, 620px);
-        padding: 18px;
-        padding-bottom: 18px;
-      }
-      .imgbox{
-        min-height: clamp(220px, 40svh, 520px);
-        padding: 14px;
-      }
-      .container-footer{
-        margin-top:auto;
-        padding-top: 12px;
-      }
-    }
-    /* 2) 태블릿 등 가로폭은 넓어도 '세로로 들었을 때' */
-    @media (orientation: portrait) and (max-width: 1200px){
-      .flex-wrap{
-        flex-direction:column; 
-        align-items:center; 
-        gap: 14px; 
-        margin: 8px auto;
-        width: min(94vw, 900px);   /* 태블릿 세로는 살짝 더 넓게 */
-      }
-      .container, .imgbox{ width: 100%; flex: 1 1 auto; }
-      .container{
-        min-height: clamp(380px, 52svh, 640px);
-        padding: 18px;
-        padding-bottom: 18px;
-      }
-      .imgbox{
-        min-height: clamp(240px, 40svh, 560px);
-        padding: 14px;
-      }
-    }
-
-    /* svh 미지원 폴백 (모바일 & 포트레이트) */
-    @supports not (height: 1svh) {
-      @media (max-width: 900px){
-        .container{ min-height: clamp(360px, 52vh, 620px); }
-        .imgbox{ min-height: clamp(220px, 40vh, 520px); }
-      }
-      @media (orientation: portrait) and (max-width: 1200px){
-        .container{ min-height: clamp(380px, 52vh, 640px); }
-        .imgbox{ min-height: clamp(240px, 40vh, 560px); }
-      }
-    }
-  </style>
+  <link rel="stylesheet" href="{{ asset_url('index.css') }}">
+  <script src="{{ asset_url('index.js') }}" defer></script>
 </head>
 <body>
   <div class="flex-wrap">
@@ -229,7 +65,14 @@ index_html = r'''
       <h1><span translate="no">만화카페 도도 도서검색</span></h1>
 
       <form method="post">
-        <input type="text" name="keyword" placeholder="제목, 최종권수, 저자, ISBN, 위치 검색" autofocus required>
+        <input type="text" name="keyword" id="keyword" list="suggestions" autocomplete="off" placeholder="제목, 저자, ISBN, 위치 검색 (예: 원피스 저자:오다 위치:12)" autofocus required>
+        <datalist id="suggestions"></datalist>
+        {% if multi_branch %}
+        <select name="branch" id="branch">
+          <option value="all">전체 지점</option>
+          {% for b in branch_options %}<option value="{{ b.id }}"{% if b.id == branch %} selected{% endif %}>{{ b.name }}</option>{% endfor %}
+        </select>
+        {% endif %}
         <button type="submit">검색</button>
       </form>
 
@@ -238,18 +81,18 @@ index_html = r'''
       {% endif %}
       {% if results %}
       <div class="result-box">
-        <table>
-          <tr><th>제목</th><th>최종권수</th><th>저자</th><th>ISBN</th><th>위치</th></tr>
-          {% for book in results %}
-          <tr>
-            <td>{{ book['제목'] }}</td>
-            <td>{{ book['최종권수'] }}</td>
-            <td>{{ book['저자'] }}</td>
-            <td>{{ book['ISBN'] }}</td>
-            <td>{{ book['위치'] }}</td>
-          </tr>
-          {% endfor %}
+        <div class="result-count">검색 결과 {{ total }}건</div>
+        {% if fuzzy %}<div class="result-count" style="color:#888;font-weight:400;">정확히 맞는 도서가 없어 비슷한 제목·저자를 보여 드립니다</div>{% endif %}
+        <table id="resultTable">
+          <tr><th>제목</th><th>최종권수</th><th>저자</th><th>ISBN</th><th>위치</th>{% if multi_branch %}<th>지점</th>{% endif %}</tr>
+          {#- 행마다 반복되는 마크업을 줄이려고 공백을 빼고 닫는 </td></tr>는 생략한다 (HTML 표준에서 허용). #}
+          {%- for book in results -%}
+          <tr><td>{{ book['제목'] }}<td>{{ book['최종권수'] }}<td>{{ book['저자'] }}<td>{{ book['ISBN'] }}<td>{{ book['위치'] }}{% if multi_branch %}<td>{{ book['지점'] }}{% endif %}
+          {%- endfor %}
         </table>
+        {% if has_more %}
+        <button type="button" id="moreBtn" data-q="{{ keyword }}" data-offset="{{ results|length }}" data-limit="{{ page_size }}" data-branch="{{ branch }}">더 보기</button>
+        {% endif %}
       </div>
       {% endif %}
       {% if no_result %}
@@ -277,19 +120,16 @@ index_html = r'''
         </div>
       </div>
 
-      <script>
-        function showPwModal(){ document.getElementById('pwModal').style.display='flex'; }
-        function hidePwModal(){ document.getElementById('pwModal').style.display='none'; }
-        document.addEventListener('DOMContentLoaded', function(){
-          const pwForm = document.getElementById('pwForm');
-          if(pwForm){ pwForm.addEventListener('submit', function(){ hidePwModal(); }); }
-        });
-      </script>
     </div>
 
     <div class="imgbox">
-      {% if img_exists %}
-        <img src="/uploaded_img" alt="첨부 이미지">
+      {% if image %}
+        <picture>
+          {% if image.srcset('webp') %}
+          <source type="image/webp" srcset="{{ image.srcset('webp') }}" sizes="(max-width: 1200px) 94vw, 40vw">
+          {% endif %}
+          <img src="{{ image.src }}"{% if image.srcset('jpeg') %} srcset="{{ image.srcset('jpeg') }}" sizes="(max-width: 1200px) 94vw, 40vw"{% endif %} alt="첨부 이미지">
+        </picture>
       {% else %}
         <div style="color:#aaa;font-size:1.1em;">(아직 첨부된 이미지가 없습니다)</div>
       {% endif %}
@@ -299,6 +139,264 @@ index_html = r'''
 </html>
 '''
 
+# 검색 화면 스타일/스크립트 (버전 붙은 /assets URL로 따로 내려보낸다)
+index_css = r'''
+:root{
+  /* 레이아웃 기본값 */
+  --gap: clamp(14px, 2.6vw, 32px);
+  --pad: clamp(16px, 3.2vw, 44px);
+  --radius: clamp(16px, 3vw, 40px);
+
+  /* 데스크톱 페이지 가로 폭: 80vw (≈ 20% 축소), 상한을 걸고 싶으면 min(80vw, 1400px) */
+  --page-width: min(80vw, 1400px);
+
+  /* 상하 여백 */
+  --page-vmargin: clamp(10px, 3.4vh, 28px);
+
+  /* 높이 기준 */
+  --img-h: clamp(340px, 47vh, 640px);
+
+  --h1: clamp(1.8rem, 2.6vw, 2.5rem);
+  --text: clamp(1.04rem, 1.15vw, 1.18rem);
+  --btn-fz: clamp(1.02rem, 1.15vw, 1.2rem);
+  --btn-py: clamp(10px, 1.3vw, 16px);
+  --btn-px: clamp(20px, 2.2vw, 38px);
+  --input-fz: clamp(1.05rem, 1.2vw, 1.22rem);
+  --input-pd: clamp(10px, 1.4vw, 16px);
+  --max-input: 680px;
+}
+
+body{
+  background:linear-gradient(135deg,#e0f7fa 60%,#f8bbd0 100%);
+  font-family:'Noto Sans KR',sans-serif;
+  margin:0; min-height:100vh;
+}
+.flex-wrap{
+  display:flex; justify-content:center; align-items:stretch;
+  width: var(--page-width);                  /* 데스크톱 기본: 80vw */
+  margin:var(--page-vmargin) auto;
+  gap:var(--gap);
+}
+
+/* 높이(검색 전에도 충분히 크게 보이도록): 83vh 기준 */
+.container{
+  padding:var(--pad);
+  min-height: max(var(--img-h), calc(83vh - (var(--page-vmargin) * 2)));
+  padding-bottom: var(--pad); /* 하단 버튼 공간 */
+
+  border-radius:var(--radius); background:white;
+  box-shadow:0 10px 56px #b2dfdb80; text-align:center;
+  border:2px solid #00bfae20; display:flex; flex-direction:column;
+}
+.imgbox{
+  background:rgba(255,255,255,0.90); border-radius:var(--radius);
+  box-shadow:0 10px 56px #b2dfdb30; display:flex; align-items:center; justify-content:center;
+  padding:22px 18px; margin:0;
+  min-height: max(var(--img-h), calc(83vh - (var(--page-vmargin) * 2)));
+}
+/* <picture>는 레이아웃에서 빠지게 해서 img가 .imgbox의 직접 자식처럼 크기를 잡게 한다 */
+.imgbox picture{ display:contents; }
+.imgbox img {
+width: 90%;
+height: 90%;
+object-fit: cover; /* 비율 유지하며 꽉 채움, 일부 잘릴 수 있음 */
+border-radius: 32px;
+box-shadow: 0 2px 18px #b2dfdb40;
+}
+h1{ color:#00695c; font-size:var(--h1); font-weight:bold; margin-bottom:16px; letter-spacing:-1px; }
+
+/* 폼/입력 중앙 정렬 */
+form{
+  margin-bottom:10px;
+  display:flex; flex-direction:column; align-items:center; gap:10px;
+}
+select{
+  font-size:var(--input-fz); padding:8px 14px;
+  border-radius:14px; border:1.8px solid #b2dfdb; background:white;
+}
+input[type="text"]{
+  display:block;
+  width:min(var(--max-input), 96%);
+  max-width:var(--max-input);
+  margin:0 auto;
+  font-size:var(--input-fz);
+  padding:var(--input-pd);
+  border-radius:16px;
+  border:1.8px solid #b2dfdb;
+  box-sizing:border-box;
+  text-align:left;
+}
+button{
+  padding:var(--btn-py) var(--btn-px);
+  margin:10px; border-radius:18px; background:#00bfae; color:white; border:none;
+  cursor:pointer; font-weight:bold; font-size:var(--btn-fz);
+  transition:0.18s; box-shadow:0 2px 12px #00bfae20;
+  align-self:center;
+}
+button:hover{ background:#00acc1; }
+.result-box{ margin-top:22px;}
+.result-count{ color:#00695c; font-weight:600; text-align:left; }
+table{
+  width:100%; border-collapse:separate; border-spacing:0 10px;
+  font-size:var(--text);
+}
+th, td{
+  border:1.8px solid #b2dfdb; padding:12px 12px; border-radius:14px; background:white;
+}
+th{ background:#00bfae; color:white; font-weight:700; }
+tr:nth-child(even) td{ background:#f0f5f5; }
+
+/* 하단 링크: 흰 배경 내부 거의 바닥 */
+.container-footer{
+  margin-top:auto;
+  padding-top:16px;
+}
+.linklike{
+  background:none; border:none; color:#00bfae; cursor:pointer;
+  text-decoration:underline; font-weight:600; font-size:1rem; font-family:inherit;
+  padding:0; transition:none;
+  text-shadow:none; box-shadow:none; outline:none; -webkit-tap-highlight-color: transparent;
+  filter:none; transform:none;
+}
+.linklike:hover{
+  background:none !important; color:#00bfae; text-decoration:underline;
+  text-shadow:none; box-shadow:none; filter:none; transform:none;
+}
+
+/* ===== 데스크톱: 좌우 정확히 5:5 (그대로 유지) ===== */
+@media (min-width: 901px){
+  .flex-wrap{
+    flex-direction: row;     
+    flex-wrap: nowrap;       
+  }
+  .container,
+  .imgbox{
+    flex: 0 0 50%;   /* 50% 고정 */
+    width: 50%;
+    min-width: 0;
+    max-width: none;
+  }
+}
+
+/* ===== 모바일 & 포트레이트(세로)에서: 위/아래 스택 + 보기 좋은 높이 ===== */
+/* 1) 전형적 모바일 너비 */
+@media (max-width: 900px){
+  .flex-wrap{
+    flex-direction:column; 
+    align-items:center; 
+    gap: 14px; 
+    margin: 8px auto;
+    width: min(94vw, 680px);   /* 모바일은 약간 더 좁게 */
+  }
+  .container, .imgbox{ width: 100%; flex: 1 1 auto; }
+
+  /* 보기 좋은 평균 높이: 합쳐도 1 스크린 남짓 */
+  .container{
+    min-height: clamp(360px, 52svh, 620px);
+    padding: 18px;
+    padding-bottom: 18px;
+  }
+  .imgbox{
+    min-height: clamp(220px, 40svh, 520px);
+    padding: 14px;
+  }
+  .container-footer{
+    margin-top:auto;
+    padding-top: 12px;
+  }
+}
+/* 2) 태블릿 등 가로폭은 넓어도 '세로로 들었을 때' */
+@media (orientation: portrait) and (max-width: 1200px){
+  .flex-wrap{
+    flex-direction:column; 
+    align-items:center; 
+    gap: 14px; 
+    margin: 8px auto;
+    width: min(94vw, 900px);   /* 태블릿 세로는 살짝 더 넓게 */
+  }
+  .container, .imgbox{ width: 100%; flex: 1 1 auto; }
+  .container{
+    min-height: clamp(380px, 52svh, 640px);
+    padding: 18px;
+    padding-bottom: 18px;
+  }
+  .imgbox{
+    min-height: clamp(240px, 40svh, 560px);
+    padding: 14px;
+  }
+}
+
+/* svh 미지원 폴백 (모바일 & 포트레이트) */
+@supports not (height: 1svh) {
+  @media (max-width: 900px){
+    .container{ min-height: clamp(360px, 52vh, 620px); }
+    .imgbox{ min-height: clamp(220px, 40vh, 520px); }
+  }
+  @media (orientation: portrait) and (max-width: 1200px){
+    .container{ min-height: clamp(380px, 52vh, 640px); }
+    .imgbox{ min-height: clamp(240px, 40vh, 560px); }
+  }
+}
+'''
+
+index_js = r'''
+function showPwModal(){ document.getElementById('pwModal').style.display='flex'; }
+function hidePwModal(){ document.getElementById('pwModal').style.display='none'; }
+document.addEventListener('DOMContentLoaded', function(){
+  const pwForm = document.getElementById('pwForm');
+  if(pwForm){ pwForm.addEventListener('submit', function(){ hidePwModal(); }); }
+  const moreBtn = document.getElementById('moreBtn');
+  if(moreBtn){ moreBtn.addEventListener('click', loadMore); }
+  const kw = document.getElementById('keyword');
+  if(kw){ kw.addEventListener('input', function(){ clearTimeout(suggestTimer); suggestTimer = setTimeout(loadSuggestions, 120); }); }
+});
+
+// 입력이 잠시 멈추면 /api/suggest 로 제목·저자 자동완성을 채운다.
+let suggestTimer = null;
+let suggestSeq = 0;
+function loadSuggestions(){
+  const q = document.getElementById('keyword').value;
+  const list = document.getElementById('suggestions');
+  if(!q.trim()){ list.innerHTML = ''; return; }
+  const seq = ++suggestSeq;
+  const branch = document.getElementById('branch');
+  fetch('/api/suggest?q=' + encodeURIComponent(q) + (branch ? '&branch=' + encodeURIComponent(branch.value) : ''))
+    .then(function(r){ return r.json(); })
+    .then(function(data){
+      if(seq !== suggestSeq || !data || !data.ok) return;
+      list.innerHTML = '';
+      data.suggestions.forEach(function(s){
+        const opt = document.createElement('option');
+        opt.value = s.text; opt.label = s.field;
+        list.appendChild(opt);
+      });
+    })
+    .catch(function(){});
+}
+
+// 다음 페이지를 /api/search 에서 받아 표 뒤에 붙인다.
+function loadMore(){
+  const btn = document.getElementById('moreBtn');
+  const offset = parseInt(btn.dataset.offset, 10);
+  btn.disabled = true;
+  fetch('/api/search?total=0&limit=' + btn.dataset.limit + '&offset=' + offset + '&q=' + encodeURIComponent(btn.dataset.q)
+        + (btn.dataset.branch ? '&branch=' + encodeURIComponent(btn.dataset.branch) : ''))
+    .then(function(r){ return r.json(); })
+    .then(function(data){
+      if(!data || !data.ok){ btn.disabled = false; return; }
+      const table = document.getElementById('resultTable');
+      data.rows.forEach(function(row){
+        const tr = document.createElement('tr');
+        row.forEach(function(value){ const td = document.createElement('td'); td.textContent = value; tr.appendChild(td); });
+        table.appendChild(tr);
+      });
+      btn.dataset.offset = offset + data.rows.length;
+      if(data.has_more){ btn.disabled = false; } else { btn.remove(); }
+    })
+    .catch(function(){ btn.disabled = false; });
+}
+'''
+
 # 관리자 로그인
 admin_login_html = r'''
 <!DOCTYPE html>
@@ -356,6 +454,7 @@ admin_html = r'''
     #downloadModal ul{text-align:left;margin:10px auto;padding:0;max-height:300px;overflow:auto;}
     #downloadModal li{margin:5px 0;list-style:none;display:flex;align-items:center;justify-content:space-between;}
     #downloadModal .filename{max-width:360px;overflow:hidden;text-overflow:ellipsis;}
+    #downloadModal .filemeta{color:#888;font-size:0.85em;}
     #downloadModal .download-btn{background:#00796b;font-size:0.97em;}
     #downloadModal .delete-btn{background:#c62828;color:white;font-size:0.97em;}
     #status{margin-top:8px;color:#c62828;font-size:0.95em;}
@@ -384,9 +483,17 @@ admin_html = r'''
 
     <form method="post" enctype="multipart/form-data">
       <input type="hidden" name="password" value="{{ admin_pw }}">
+      {% if multi_branch %}
+      <select name="branch" id="branchSelect">
+        {% for b in branch_options %}<option value="{{ b.id }}"{% if b.id == admin_branch %} selected{% endif %}>{{ b.name }}</option>{% endfor %}
+      </select>
+      {% else %}
+      <input type="hidden" name="branch" id="branchSelect" value="{{ admin_branch }}">
+      {% endif %}
       <input type="file" name="file" accept=".xlsx" required>
       <button type="submit" name="action" value="books">도서 업로드</button>
     </form>
+    <div id="ingestStatus" class="filelabel" data-job="{{ ingest_job or '' }}" data-branch="{{ admin_branch }}"></div>
 
     <form method="post" enctype="multipart/form-data">
       <input type="hidden" name="password" value="{{ admin_pw }}">
@@ -397,13 +504,24 @@ admin_html = r'''
 
     <div style="margin-top:22px;">
       <button id="openDownload" type="button" class="linklike">기존 도서 데이터 다운로드/삭제</button>
+      <button type="button" class="linklike" onclick="exportCatalog('csv')">현재 목록 CSV</button>
+      <button type="button" class="linklike" onclick="exportCatalog('ndjson')">NDJSON</button>
       <a href="/" class="linklike">검색 화면으로</a>
       <div id="status"></div>
     </div>
 
+    <div id="searchStats" style="margin-top:26px;text-align:left;">
+      <div class="filelabel" style="text-align:center;">검색어 통계 <button type="button" class="linklike" onclick="loadSearchStats()">새로고침</button></div>
+      <div style="display:flex;gap:24px;justify-content:center;flex-wrap:wrap;">
+        <div><b>많이 찾은 검색어</b><ol id="topQueries"><li>불러오는 중...</li></ol></div>
+        <div><b>찾았는데 없던 검색어</b><ol id="zeroQueries"><li>불러오는 중...</li></ol></div>
+      </div>
+      <div id="searchStatsNote" class="filemeta" style="text-align:center;color:#888;font-size:0.85em;"></div>
+    </div>
+
     <div id="downloadModal">
       <div class="modal-inner">
-        <div style="font-size:1.09em;font-weight:bold;margin-bottom:12px;">도서 데이터 파일 목록</div>
+        <div style="font-size:1.09em;font-weight:bold;margin-bottom:12px;">도서 데이터 파일 목록<span id="fileListBranch"></span></div>
         <ul id="fileList"><li>불러오는 중...</li></ul>
         <button class="cancel" onclick="hideDownloadModal()">닫기</button>
         <span class="close-x" onclick="hideDownloadModal()">×</span>
@@ -422,6 +540,77 @@ admin_html = r'''
       }
     });
 
+    // 관리자 요청은 지금 고른 지점(업로드 폼의 지점 선택)을 대상으로 한다.
+    function branchParam(branch){
+      var sel=document.getElementById('branchSelect');
+      return '&branch='+encodeURIComponent(branch || (sel ? sel.value : ''));
+    }
+
+    // 백그라운드 적재 진행 상황을 /ingest-status 에서 1초마다 받아 보여 준다.
+    function pollIngest(){
+      var box=document.getElementById('ingestStatus');
+      if(!box || !box.dataset.job) return;
+      fetch('/ingest-status?pw={{ admin_pw }}&job='+encodeURIComponent(box.dataset.job)+branchParam(box.dataset.branch))
+        .then(function(r){ return r.json(); })
+        .then(function(data){
+          if(!data || !data.ok || !data.job){ box.textContent='처리 상태를 확인할 수 없습니다.'; return; }
+          var job=data.job;
+          if(job.state==='done'){ box.textContent=job.filename+': 반영 완료 ('+job.rows+'행)'; showChanges(box, job.changes); return; }
+          if(job.state==='failed'){ box.style.color='#c62828'; box.textContent=job.filename+': 사용할 수 없는 엑셀입니다 - '+job.error; return; }
+          box.textContent=job.filename+(job.state==='indexing' ? ': 색인 만드는 중... ' : ': 읽는 중... ')+job.rows+(job.total_rows ? '/'+job.total_rows : '')+'행';
+          setTimeout(pollIngest, 1000);
+        })
+        .catch(function(){ setTimeout(pollIngest, 2000); });
+    }
+    document.addEventListener('DOMContentLoaded', pollIngest);
+
+    // 이전 카탈로그 대비 추가/변경/삭제 건수와 앞쪽 예시
+    function showChanges(box, changes){
+      if(!changes) return;
+      box.appendChild(document.createTextNode(' · 추가 '+changes.inserted+' · 변경 '+changes.updated+' · 삭제 '+changes.deleted+'건'));
+      if(!(changes.inserted || changes.updated || changes.deleted)) return;
+      var details=document.createElement('details'); details.style.textAlign='left';
+      var summary=document.createElement('summary'); summary.textContent='변경 내역 보기 (기준: '+changes.base+')';
+      details.appendChild(summary);
+      var ul=document.createElement('ul');
+      function add(label, text){ var li=document.createElement('li'); li.textContent='['+label+'] '+text; ul.appendChild(li); }
+      changes.samples.updated.forEach(function(u){
+        add('변경', u['제목']+' / '+u['저자']+' - '+Object.keys(u.changes).map(function(c){ return c+': '+u.changes[c][0]+' → '+u.changes[c][1]; }).join(', '));
+      });
+      changes.samples.inserted.forEach(function(r){ add('추가', r['제목']+' / '+r['저자']+' ('+r['최종권수']+'권, '+r['위치']+')'); });
+      changes.samples.deleted.forEach(function(r){ add('삭제', r['제목']+' / '+r['저자']); });
+      details.appendChild(ul);
+      box.appendChild(details);
+    }
+
+    // 인기 검색어와 결과 없는 검색어 (/search-stats)
+    function loadSearchStats(){
+      fetch('/search-stats?pw={{ admin_pw }}&n=20')
+        .then(function(r){ return r.json(); })
+        .then(function(data){
+          var top=document.getElementById('topQueries'), zero=document.getElementById('zeroQueries');
+          if(!data || !data.ok){ top.innerHTML=zero.innerHTML='<li>'+((data && data.error) || '불러오지 못했습니다')+'</li>'; return; }
+          function fill(ol, rows){
+            ol.innerHTML='';
+            if(!rows.length){ ol.innerHTML='<li>아직 없습니다</li>'; return; }
+            rows.forEach(function(row){
+              var li=document.createElement('li');
+              li.textContent=row.q+' · '+row.count+'회'+(row.last_at ? ' · 최근 '+formatDate(row.last_at) : '');
+              ol.appendChild(li);
+            });
+          }
+          fill(top, data.top); fill(zero, data.zero);
+          document.getElementById('searchStatsNote').textContent='전체 검색 '+data.searches.toLocaleString()+'회 · 검색어 '+data.queries.toLocaleString()+'개';
+        })
+        .catch(function(){});
+    }
+    document.addEventListener('DOMContentLoaded', loadSearchStats);
+
+    // 정제된 현재 카탈로그 내보내기 (/export)
+    function exportCatalog(fmt){
+      location.href='/export?pw={{ admin_pw }}&format='+fmt+branchParam();
+    }
+
     function showDownloadModal(){
       document.getElementById('downloadModal').style.display='flex';
       loadFileList();
@@ -431,17 +620,26 @@ admin_html = r'''
 
     function loadFileList(){
       setStatus('');
-      fetch('/filelist?pw={{ admin_pw }}')
+      var sel=document.getElementById('branchSelect'), label=document.getElementById('fileListBranch');
+      if(label && sel && sel.options){ label.textContent=' ('+sel.options[sel.selectedIndex].text+')'; }
+      fetch('/filelist?pw={{ admin_pw }}'+branchParam())
         .then(function(r){ if(!r.ok){ setStatus('목록 로드 실패: '+r.status); } return r.json(); })
         .then(function(data){
           var ul=document.getElementById('fileList');
           if(!data){ ul.innerHTML='<li>오류: 응답 없음</li>'; return; }
           if(data.error){ ul.innerHTML='<li>'+ (data.error || '오류') +'</li>'; return; }
-          if(!data.files || data.files.length==0){ ul.innerHTML='<li>파일이 없습니다</li>'; return; }
+          if(!data.entries || data.entries.length==0){ ul.innerHTML='<li>파일이 없습니다</li>'; return; }
           ul.innerHTML='';
-          data.files.forEach(function(file){
+          data.entries.forEach(function(entry){
+            var file=entry.name;
             var li=document.createElement('li');
             var nameSpan=document.createElement('span'); nameSpan.className='filename'; nameSpan.textContent=file;
+            var meta=document.createElement('small'); meta.className='filemeta';
+            meta.textContent=[formatDate(entry.uploaded_at), entry.rows!=null ? entry.rows.toLocaleString()+'행' : '', formatSize(entry.size)]
+              .filter(Boolean).join(' · ')+(file===data.current ? ' · 현재 사용 중' : '')
+              +(entry.changes ? ' · +'+entry.changes.inserted+' ~'+entry.changes.updated+' -'+entry.changes.deleted : '');
+            meta.title='SHA-256 '+entry.sha256;
+            nameSpan.appendChild(document.createElement('br')); nameSpan.appendChild(meta);
             var dBtn=document.createElement('button'); dBtn.className='download-btn'; dBtn.textContent='डाउन로드'; dBtn.addEventListener('click', function(){ downloadFile(file); });
             var delBtn=document.createElement('button'); delBtn.className='delete-btn'; delBtn.textContent='삭제'; delBtn.addEventListener('click', function(){ deleteFile(file); });
             li.appendChild(nameSpan); li.appendChild(dBtn); li.appendChild(delBtn); ul.appendChild(li);
@@ -450,9 +648,18 @@ admin_html = r'''
         .catch(function(err){ setStatus('목록 로드 오류: ' + (err && err.message ? err.message : err)); });
     }
 
+    function formatSize(n){
+      if(n>=1048576) return (n/1048576).toFixed(1)+'MB';
+      return Math.max(1, Math.round(n/1024))+'KB';
+    }
+    function formatDate(ts){
+      var d=new Date(ts*1000), p=function(x){ return (x<10?'0':'')+x; };
+      return d.getFullYear()+'-'+p(d.getMonth()+1)+'-'+p(d.getDate())+' '+p(d.getHours())+':'+p(d.getMinutes());
+    }
+
     function downloadFile(fname){
       setStatus('');
-      const url = '/download/' + encodeURIComponent(fname) + '?pw={{ admin_pw }}';
+      const url = '/download/' + encodeURIComponent(fname) + '?pw={{ admin_pw }}' + branchParam();
       fetch(url)
         .then(function(resp){
           if(!resp.ok){ setStatus('다운로드 실패: ' + resp.status); return null; }
@@ -467,7 +674,7 @@ admin_html = r'''
     function deleteFile(fname){
       setStatus('');
       if(!confirm(fname+' 파일을 삭제하시겠습니까?')) return;
-      fetch('/deletefile/'+encodeURIComponent(fname)+'?pw={{ admin_pw }}', {method:'POST'})
+      fetch('/deletefile/'+encodeURIComponent(fname)+'?pw={{ admin_pw }}'+branchParam(), {method:'POST'})
         .then(function(r){ if(!r.ok){ setStatus('삭제 실패: '+r.status); return null; } return r.json(); })
         .then(function(data){ if(!data) return; if(data.success){ loadFileList(); } else{ setStatus(data.msg || '삭제 실패'); } })
         .catch(function(err){ setStatus('삭제 오류: ' + (err && err.message ? err.message : err)); });
@@ -477,170 +684,541 @@ admin_html = r'''
 </html>
 '''
 
+# ===================== 템플릿 등록 / 정적 자원 =====================
+# 템플릿은 한 번 컴파일해 Jinja 캐시에 두고, 검색 화면 CSS/JS는 내용 해시가 붙은 URL로
+# 오래 캐시되게 내려보낸다. 내용이 바뀌면 URL이 바뀌므로 immutable로 둬도 안전하다.
+app.jinja_env.loader = DictLoader({
+    "index.html": index_html,
+    "admin_login.html": admin_login_html,
+    "admin.html": admin_html,
+})
+
+ASSET_MAX_AGE = 365 * 24 * 3600
+ASSETS = {}
+
+def register_asset(name, body, mimetype):
+    data = body.encode("utf-8")
+    ASSETS[name] = {"data": data, "mimetype": mimetype, "version": hashlib.sha256(data).hexdigest()[:16]}
+
+register_asset("index.css", index_css, "text/css")
+register_asset("index.js", index_js, "application/javascript")
+
+def asset_url(name):
+    return f"/assets/{ASSETS[name]['version']}/{name}"
+
+@app.context_processor
+def inject_asset_url():
+    return {"asset_url": asset_url}
+
 # ===================== 유틸 =====================
-def latest_books_file():
-    files = [f for f in os.listdir(BOOKS_DIR) if f.endswith(".xlsx")]
-    if not files:
-        return None
-    files.sort(reverse=True)
-    return os.path.join(BOOKS_DIR, files[0])
-
-def read_books():
-    latest_file = latest_books_file()
-    if not latest_file:
-        raise FileNotFoundError("업로드된 도서 데이터가 없습니다!")
-
-    df = pd.read_excel(latest_file, dtype={'ISBN': str})
-
-    required = ["제목", "최종권수", "저자", "ISBN", "위치"]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(f"엑셀에 {missing} 컬럼이 없습니다!")
-
-    df = df.fillna('')
-    df = df.apply(lambda col: col.map(lambda x: '' if (isinstance(x, str) and x.strip().lower() in ('nan', 'none', 'null', '없음')) else x))
-    def clean_int_like(x):
-        if x == '' or x is None: return ''
-        s = str(x).strip()
+# 검색과 카탈로그 적재는 정해진 슬롯에서만 돈다 (serving.py 참고). 줄이 넘치면 Busy → 503.
+search_pool = BoundedExecutor("search", serving.search_slots(), serving.search_queue(), serving.SEARCH_WAIT)
+load_pool = BoundedExecutor("catalog-load", 1, serving.load_queue(), serving.CATALOG_LOAD_WAIT)
+branches = Branches([Branch(branch_id, name, directory, load_pool, RESULT_CACHE_BYTES, RESULT_CACHE_TTL)
+                     for branch_id, name, directory in parse_branches(BRANCHES, BOOKS_DIR)], search_pool)
+MULTI_BRANCH = len(branches) > 1
+
+@app.context_processor
+def inject_branches():
+    return {"branch_options": list(branches), "multi_branch": MULTI_BRANCH}
+
+# 워밍업 때 한 번씩 돌려 보는 검색: 없는 글자(모든 블롭을 끝까지 훑는다), 초성, 한글(맞는 게 없으면 오타 검색)
+WARM_UP_QUERIES = ["\x01", "ㄱ", "가나다라마"]
+started_at = time.time()
+warm_up_state = {"done": False, "seconds": None}
+
+def warm_up():
+    # 서버가 요청을 받기 전에 부른다: gunicorn --preload 면 워커를 fork 하기 전의 마스터,
+    # 아니면 워커마다 (gunicorn.conf.py), waitress 면 serve 전에 (serving.warm_up_enabled 참고).
+    # 실행기 스레드가 fork 되면 자식에서 멈춘 채로 남으므로 여기서는 슬롯을 거치지 않고 직접 읽는다.
+    # 카탈로그를 열고(스냅샷이 없으면 엑셀에서 만든다) 페이지를 올린 뒤 검색 경로를 한 번씩 돌려서
+    # 첫 손님 검색이 이후 검색보다 느리지 않게 한다. 카탈로그가 있는 지점들의 {지점 id: 카탈로그}를 돌려준다.
+    started = time.perf_counter()
+    loaded = {}
+    for branch in branches:
         try:
-            f = float(s)
-            return str(int(f)) if f.is_integer() else s
-        except (ValueError, TypeError):
-            return s
+            branch.catalogs.reload()
+            catalog = branch.catalogs.get()
+        except (FileNotFoundError, ValueError):
+            continue
+        catalog.touch()
+        for query in WARM_UP_QUERIES:
+            catalog.index.search_page(query, 0, PAGE_SIZE)
+        catalog.suggester.suggest("가", SUGGEST_SIZE)
+        loaded[branch.id] = catalog
+    for name in ("index.html", "admin.html"):
+        app.jinja_env.get_template(name)  # 템플릿 컴파일
+    warm_up_state.update(done=True, seconds=round(time.perf_counter() - started, 4))
+    return loaded
+
+def labeled_rows(page, as_values=False):
+    # 검색 결과 (지점, 카탈로그, 행 번호, 일치 종류) -> 화면(dict)/API(배열) 행. 지점이 여럿이면 지점 이름을 붙인다.
+    rows = []
+    for branch, catalog, row, _ in page:
+        if as_values:
+            values = catalog.row_values([row])[0]
+            rows.append(values + [branch.name] if MULTI_BRANCH else values)
+        else:
+            book = catalog.rows([row])[0]
+            if MULTI_BRANCH:
+                book["지점"] = branch.name
+            rows.append(book)
+    return rows
+
+search_log = SearchLog(SEARCH_LOG_DIR) if SEARCH_LOG else None
 
-    for col in ['최종권수', '위치']:
-        if col in df.columns:
-            df[col] = df[col].apply(clean_int_like)
+def log_search(keyword, selected, page, total, started):
+    # 첫 페이지 검색만 남긴다 ("더 보기"는 같은 검색의 이어 받기라 세지 않는다). 디스크 쓰기는 기록 스레드 몫.
+    if search_log is None:
+        return
+    extra = {"fuzzy": bool(page) and page[0][3] == MATCH_FUZZY}
+    if MULTI_BRANCH:
+        version = ",".join(f"{b.id}:{b.catalogs.version()}" for b in selected)
+        extra["branch"] = [b.id for b in selected]
+    else:
+        version = branches.default.catalogs.version()
+    # 전체 건수를 세지 않은 요청은 찾은 만큼(페이지 크기)만 안다.
+    hits = total if total is not None else len(page)
+    search_log.record(keyword, hits, time.perf_counter() - started, version, **extra)
 
-    return df
+def admin_branch(branch_id):
+    # 관리자 요청의 ?branch= (비어 있으면 첫 지점). 모르는 id면 None.
+    return branches.get(branch_id)
 
 def allowed_ext(filename, allow_set):
     ext = os.path.splitext(filename)[1].lower()
     return ext in allow_set
 
-def current_image_path():
-    for ext in [".jpg", ".jpeg", ".png"]:
-      p = os.path.join(BOOKS_DIR, IMAGE_BASENAME + ext)
-      if os.path.exists(p):
-          return p
-    return None
-
-def unique_filename(directory: str, original_name: str) -> str:
-    base_name = os.path.basename(original_name)
-    name, ext = os.path.splitext(base_name)
-    candidate = base_name
-    idx = 1
-    while os.path.exists(os.path.join(directory, candidate)):
-        candidate = f"{name}_{idx}{ext}"
-        idx += 1
-    return candidate
+image_store = ImageStore(BOOKS_DIR, IMAGE_BASENAME)
+IMAGE_MAX_AGE = 365 * 24 * 3600
 
 # ===================== 라우트 =====================
+# 검색어 없는 첫 화면은 (이미지, 카탈로그 버전)이 같으면 내용이 같으므로 한 번 그려 두고 재사용한다.
+_index_page_cache = {}
+
+def cached_index_page():
+    image = image_store.current()
+    key = (image.hash if image else None, branches.versions())
+    page = _index_page_cache.get(key)
+    if page is None:
+        html = render_template("index.html", results=[], image=image, error_msg=None,
+                               no_result=False, keyword="", total=0, has_more=False, page_size=PAGE_SIZE,
+                               branch=ALL_BRANCHES)
+        page = (html, hashlib.sha256(html.encode("utf-8")).hexdigest()[:16])
+        _index_page_cache.clear()
+        _index_page_cache[key] = page
+    resp = Response(page[0], mimetype="text/html")
+    resp.set_etag(page[1])
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
+
 @app.route("/", methods=["GET", "POST"])
 def index():
+    if request.method == "GET":
+        return cached_index_page()
     results = []
-    img_exists = current_image_path() is not None
+    image = image_store.current()
     error_msg = None
     no_result = False
-    if request.method == "POST":
-        keyword = request.form["keyword"]
-        try:
-            df = read_books()
-            results = df[df.apply(lambda row: row.astype(str).str.contains(keyword, case=False).any(), axis=1)].to_dict("records")
-            if len(results) == 0:
-                no_result = True
-        except FileNotFoundError:
-            error_msg = "업로드된 도서 데이터가 없습니다. 관리자에게 문의해 주세요."
-        except ValueError as e:
-            error_msg = str(e)
-    return render_template_string(index_html, results=results, img_exists=img_exists, error_msg=error_msg, no_result=no_result)
+    fuzzy = False
+    total = 0
+    has_more = False
+    keyword = request.form["keyword"]
+    branch = request.form.get("branch", ALL_BRANCHES)
+    try:
+        selected = branches.select(branch)
+        # 첫 페이지만 그리고, 나머지는 화면에서 /api/search 로 이어 받는다.
+        # 카탈로그 적재("catalog")와 매칭("match") 단계는 branches.search_page 안에서 잰다.
+        started = time.perf_counter()
+        page, total, has_more = branches.search_page(selected, keyword, 0, PAGE_SIZE)
+        with metrics.stage("rows"):
+            results = labeled_rows(page)
+        log_search(keyword, selected, page, total, started)
+        fuzzy = bool(page) and page[0][3] == MATCH_FUZZY
+        if total == 0:
+            no_result = True
+    except KeyError:
+        error_msg = "없는 지점입니다."
+    except FileNotFoundError:
+        error_msg = "업로드된 도서 데이터가 없습니다. 관리자에게 문의해 주세요."
+    except ValueError as e:
+        error_msg = str(e)
+    with metrics.stage("render"):
+        return render_template("index.html", results=results, image=image, error_msg=error_msg,
+                               no_result=no_result, keyword=keyword, total=total, has_more=has_more,
+                               page_size=PAGE_SIZE, branch=branch, fuzzy=fuzzy)
+
+@app.errorhandler(Busy)
+def busy(e):
+    # 검색·적재 슬롯이 모두 찼다: 오래 붙잡고 있지 않고 곧 다시 시도하라고 알려 준다.
+    if request.path.startswith("/api/"):
+        resp = jsonify({"ok": False, "error": "요청이 많아 잠시 후 다시 시도해 주세요."})
+    else:
+        resp = Response("요청이 많아 잠시 후 다시 시도해 주세요.", mimetype="text/plain")
+    resp.status_code = 503
+    resp.headers["Retry-After"] = "1"
+    return resp
+
+@app.route("/assets/<version>/<name>")
+def asset(version, name):
+    entry = ASSETS.get(name)
+    if entry is None or entry["version"] != version:
+        return "Not found", 404
+    resp = Response(entry["data"], mimetype=entry["mimetype"])
+    resp.set_etag(entry["version"])
+    resp.cache_control.public = True
+    resp.cache_control.max_age = ASSET_MAX_AGE
+    resp.cache_control.immutable = True
+    return resp.make_conditional(request)
+
+@app.route("/api/search")
+def api_search():
+    keyword = request.args.get("q", "")
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = min(max(request.args.get("limit", PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    with_total = request.args.get("total", "1") != "0"
+    try:
+        selected = branches.select(request.args.get("branch", ALL_BRANCHES))
+    except KeyError:
+        return jsonify({"ok": False, "error": "없는 지점입니다."}), 404
+    started = time.perf_counter()
+    try:
+        page, total, has_more = branches.search_page(selected, keyword, offset, limit, with_total)
+    except FileNotFoundError:
+        return jsonify({"ok": False, "error": "업로드된 도서 데이터가 없습니다."}), 503
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+    # 행은 컬럼 이름을 반복하지 않도록 배열로 보낸다. 지점이 여럿이면 마지막 칸이 지점 이름이다.
+    with metrics.stage("rows"):
+        body = {
+            "ok": True, "q": keyword, "offset": offset, "limit": limit, "has_more": has_more,
+            "columns": SEARCH_COLUMNS + ["지점"] if MULTI_BRANCH else SEARCH_COLUMNS,
+            "rows": labeled_rows(page, as_values=True),
+            "match": [match for _, _, _, match in page],
+        }
+        if MULTI_BRANCH:
+            body["branch"] = [b.id for b, _, _, _ in page]
+    if with_total:
+        body["total"] = total
+    if offset == 0:
+        log_search(keyword, selected, page, total, started)
+    with metrics.stage("serialize"):
+        return jsonify(body)
+
+@app.route("/api/suggest")
+def api_suggest():
+    prefix = request.args.get("q", "")
+    n = min(max(request.args.get("n", SUGGEST_SIZE, type=int), 1), MAX_SUGGEST_SIZE)
+    try:
+        selected = branches.select(request.args.get("branch", ALL_BRANCHES))
+    except KeyError:
+        return jsonify({"ok": False, "error": "없는 지점입니다."}), 404
+    try:
+        suggestions = branches.suggest(selected, prefix, n)
+    except (FileNotFoundError, ValueError):
+        return jsonify({"ok": False, "q": prefix, "suggestions": []}), 503
+    return jsonify({"ok": True, "q": prefix, "suggestions": suggestions})
 
 @app.route("/dodo-manager", methods=["GET", "POST"])
 def admin():
     if request.method == "POST" and request.form.get("action") == "login":
         pw = request.form.get("password", "")
         if pw == ADMIN_PASSWORD:
-            return render_template_string(admin_html, admin_pw=pw)
+            return render_template("admin.html", admin_pw=pw, admin_branch=branches.default.id)
         else:
             flash("비밀번호가 틀렸습니다.", "danger")
-            return render_template_string(admin_login_html)
+            return render_template("admin_login.html")
 
     if request.method == "GET":
-        return render_template_string(admin_login_html)
+        return render_template("admin_login.html")
 
     action = request.form.get("action")
     pw = request.form.get("password", "")
+    ingest_job = None
+    branch = admin_branch(request.form.get("branch"))
     if pw != ADMIN_PASSWORD:
         flash("권한이 없습니다. 다시 로그인해 주세요.", "danger")
         return redirect(url_for("admin"))
 
     if action == "books":
         file = request.files.get("file")
-        if file and allowed_ext(file.filename, ALLOWED_XLSX):
-            os.makedirs(BOOKS_DIR, exist_ok=True)
-            final_name = unique_filename(BOOKS_DIR, file.filename)
-            file.save(os.path.join(BOOKS_DIR, final_name))
-            flash("도서 데이터가 성공적으로 업로드되었습니다!", "success")
+        if branch is None:
+            flash("없는 지점입니다.", "danger")
+            branch = branches.default
+        elif file and allowed_ext(file.filename, ALLOWED_XLSX):
+            os.makedirs(branch.books_dir, exist_ok=True)
+            # 파일만 받아 두고 검증·색인·게시는 그 지점의 적재 스레드에 넘긴다. 잘못된 워크북은 거기서 걸러진다.
+            with metrics.stage("stage_upload"):
+                tmp = stage_upload(branch.books_dir, file.stream)
+            ingest_job = branch.ingest.submit(tmp, file.filename)
+            flash(f"{branch.name} 도서 데이터를 받았습니다. 검증과 색인이 끝나면 바로 반영됩니다.", "success")
         else:
             flash("올바른 엑셀 파일(.xlsx)만 업로드 가능합니다.", "danger")
 
     elif action == "image":
         imgfile = request.files.get("imgfile")
         if imgfile and allowed_ext(imgfile.filename, ALLOWED_IMG):
-            for e in [".jpg", ".jpeg", ".png"]:
-                old = os.path.join(BOOKS_DIR, IMAGE_BASENAME + e)
-                if os.path.exists(old):
-                    try: os.remove(old)
-                    except: pass
+            # 축소본(WebP/JPEG)은 여기서 한 번만 만들고, 이후 요청은 만들어 둔 파일을 그대로 보낸다.
             ext = os.path.splitext(imgfile.filename)[1].lower()
-            imgfile.save(os.path.join(BOOKS_DIR, IMAGE_BASENAME + ext))
+            with metrics.stage("image_save"):
+                image_store.save(imgfile.read(), ext)
             flash("이미지가 성공적으로 업로드되었습니다!", "success")
         else:
             flash("올바른 이미지 파일(jpg/png)만 업로드 가능합니다.", "danger")
 
-    return render_template_string(admin_html, admin_pw=pw)
+    return render_template("admin.html", admin_pw=pw, ingest_job=ingest_job,
+                           admin_branch=(branch or branches.default).id)
+
+@app.route("/ingest-status")
+def ingest_status():
+    if request.args.get("pw") != ADMIN_PASSWORD:
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+    branch = admin_branch(request.args.get("branch"))
+    if branch is None:
+        return jsonify({"ok": False, "error": "없는 지점입니다."}), 404
+    job_id = request.args.get("job")
+    if job_id:
+        return jsonify({"ok": True, "job": branch.ingest.status(job_id)})
+    return jsonify({"ok": True, "jobs": branch.ingest.recent()})
 
 @app.route("/filelist")
 def filelist():
     if request.args.get("pw") != ADMIN_PASSWORD:
         return jsonify({"ok": False, "error": "Unauthorized", "files": []}), 401
-    files = [f for f in os.listdir(BOOKS_DIR) if f.endswith(".xlsx")]
-    files.sort(reverse=True)
-    return jsonify({"ok": True, "files": files})
+    branch = admin_branch(request.args.get("branch"))
+    if branch is None:
+        return jsonify({"ok": False, "error": "없는 지점입니다.", "files": []}), 404
+    with metrics.stage("manifest"):
+        current, entries = branch.uploads.get()
+    # files는 예전 화면과의 호환용 이름 목록, entries는 최신순 메타데이터
+    return jsonify({"ok": True, "current": current, "files": [e["name"] for e in entries], "entries": entries})
+
+@app.route("/search-stats")
+def search_stats():
+    # 인기 검색어 / 결과 없는 검색어 (검색 기록에서 새로 붙은 부분만 더해 센다)
+    if request.args.get("pw") != ADMIN_PASSWORD:
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+    if search_log is None:
+        return jsonify({"ok": False, "error": "검색 기록이 꺼져 있습니다 (SEARCH_LOG=0)."}), 404
+    n = min(max(request.args.get("n", 20, type=int), 1), 200)
+    with metrics.stage("search_stats"):
+        stats = search_log.stats.top(n)
+    return jsonify({"ok": True, **stats, "log": search_log.counters()})
+
+@metrics.register_collector
+def search_log_metrics():
+    if search_log is None:
+        return []
+    c = search_log.counters()
+    return [
+        ("dodo_search_log_buffered", "gauge", "아직 쓰지 않은 검색 기록 수", [({}, c["buffered"])]),
+        ("dodo_search_log_written_total", "counter", "파일에 쓴 검색 기록 수", [({}, c["written"])]),
+        ("dodo_search_log_dropped_total", "counter", "버퍼가 넘치거나 쓰기 실패로 버린 검색 기록 수",
+         [({}, c["dropped"])]),
+        ("dodo_search_log_flushes_total", "counter", "묶음 쓰기 횟수", [({}, c["flushes"])]),
+    ]
+
+@app.route("/catalog-status")
+def catalog_status():
+    if request.args.get("pw") != ADMIN_PASSWORD:
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+    # 맨 위는 예전 화면과의 호환용으로 첫 지점, branches에 지점별 메모리·적재 시간·결과 캐시
+    default = branches.default
+    return jsonify({"ok": True, **default.catalogs.stats(), "result_cache": default.results.stats(),
+                    "branches": {b.id: b.stats() for b in branches},
+                    "executors": {pool.name: pool.stats() for pool in (search_pool, load_pool)}})
+
+@metrics.register_collector
+def catalog_metrics():
+    # 지점마다 {"branch": id} 라벨을 붙인다.
+    per_branch = [({"branch": b.id}, b.catalogs.stats()) for b in branches]
+
+    def ratio(hits, lookups):
+        return round(hits / lookups, 6) if lookups else 0
+
+    return [
+        ("dodo_catalog_rows", "gauge", "현재 카탈로그 행 수", [(l, s["rows"]) for l, s in per_branch]),
+        ("dodo_catalog_info", "gauge", "현재 카탈로그 버전",
+         [(dict(l, version=s["version"] or ""), 1) for l, s in per_branch]),
+        ("dodo_catalog_mapped_bytes", "gauge", "mmap 된 스냅샷 크기", [(l, s["mapped_bytes"]) for l, s in per_branch]),
+        ("dodo_catalog_load_seconds", "gauge", "마지막 카탈로그 적재 시간",
+         [(l, s["load_seconds"] or 0) for l, s in per_branch]),
+        ("dodo_catalog_cache_total", "counter", "카탈로그 캐시 조회 결과",
+         [(dict(l, result=name), s[name]) for l, s in per_branch for name in ("hits", "misses", "stale")]),
+        ("dodo_catalog_reloads_total", "counter", "카탈로그 다시 읽은 횟수", [(l, s["reloads"]) for l, s in per_branch]),
+        ("dodo_catalog_cache_hit_ratio", "gauge", "카탈로그 캐시 적중률",
+         [(l, ratio(s["hits"], s["hits"] + s["misses"] + s["stale"])) for l, s in per_branch]),
+        ("dodo_suggest_cache_hit_ratio", "gauge", "자동완성 LRU 적중률 (현재 버전)",
+         [(l, ratio(s["suggest_hits"], s["suggest_hits"] + s["suggest_misses"])) for l, s in per_branch]),
+    ]
+
+@metrics.register_collector
+def result_cache_metrics():
+    per_branch = [({"branch": b.id}, b.results.stats()) for b in branches]
+    return [
+        ("dodo_result_cache_total", "counter", "검색 결과 캐시 조회 결과",
+         [(dict(l, result=result), s[key]) for l, s in per_branch
+          for result, key in (("hit", "hits"), ("miss", "misses"))]),
+        ("dodo_result_cache_hit_ratio", "gauge", "검색 결과 캐시 적중률", [(l, s["hit_ratio"]) for l, s in per_branch]),
+        ("dodo_result_cache_bytes", "gauge", "검색 결과 캐시 사용량", [(l, s["bytes"]) for l, s in per_branch]),
+        ("dodo_result_cache_max_bytes", "gauge", "검색 결과 캐시 예산", [(l, s["max_bytes"]) for l, s in per_branch]),
+        ("dodo_result_cache_entries", "gauge", "검색 결과 캐시 항목 수", [(l, s["entries"]) for l, s in per_branch]),
+        ("dodo_result_cache_evictions_total", "counter", "예산 초과로 버린 항목 수",
+         [(l, s["evictions"]) for l, s in per_branch]),
+    ]
+
+@metrics.register_collector
+def executor_metrics():
+    pools = [(pool.name, pool.stats()) for pool in (search_pool, load_pool)]
+    return [
+        ("dodo_executor_workers", "gauge", "실행기 슬롯 수", [({"pool": name}, s["workers"]) for name, s in pools]),
+        ("dodo_executor_in_flight", "gauge", "실행 중이거나 기다리는 작업 수",
+         [({"pool": name}, s["in_flight"]) for name, s in pools]),
+        ("dodo_executor_completed_total", "counter", "끝난 작업 수",
+         [({"pool": name}, s["completed"]) for name, s in pools]),
+        ("dodo_executor_rejected_total", "counter", "자리가 없어 503으로 돌려보낸 작업 수",
+         [({"pool": name}, s["rejected"]) for name, s in pools]),
+    ]
+
+# ===================== 상태 확인 =====================
+# /healthz : 프로세스가 살아 있으면 항상 200 (재시작 판단용). 카탈로그 상태도 같이 보여 준다.
+# /readyz  : 이 워커가 검색에 쓸 카탈로그를 들고 있으면 200, 적재 중이거나 못 읽었으면 503 (트래픽 투입 판단용).
+#            상태만 읽고 적재를 기다리지 않는다 (CatalogCache.readiness).
+#            올린 카탈로그가 아직 없으면(empty) 관리자가 업로드할 수 있도록 준비된 것으로 본다.
+#            워밍업을 꺼서 아직 안 읽었으면(cold) 준비되지 않은 것이다: 기다리지 않고 백그라운드 적재만
+#            걸어 두므로 다음 확인부터 loading → ready 로 넘어간다.
+READY_STATES = {"ready", "stale", "empty"}
+
+def catalog_health():
+    result = {}
+    for branch in branches:
+        state = branch.catalogs.readiness()
+        stats = branch.catalogs.stats()
+        result[branch.id] = {"state": state, "version": stats["version"], "rows": stats["rows"],
+                             "load_seconds": stats["load_seconds"], "error": stats["error"]}
+    return result
+
+def health_body(catalogs):
+    return {"pid": os.getpid(), "uptime_s": round(time.time() - started_at, 1),
+            "warm_up": warm_up_state, "branches": catalogs}
+
+@app.route("/healthz")
+def healthz():
+    return jsonify({"ok": True, **health_body(catalog_health())})
+
+@app.route("/readyz")
+def readyz():
+    for branch in branches:
+        if branch.catalogs.readiness() == "cold":
+            branch.catalogs.start_loading()
+    catalogs = catalog_health()
+    ready = all(c["state"] in READY_STATES for c in catalogs.values())
+    resp = jsonify({"ok": ready, "ready": ready, **health_body(catalogs)})
+    resp.status_code = 200 if ready else 503
+    resp.cache_control.no_store = True
+    return resp
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
 
 @app.route("/download/<path:filename>")
 def download_file(filename):
     if request.args.get("pw") != ADMIN_PASSWORD:
         return "Unauthorized", 401
-    file_path = os.path.join(BOOKS_DIR, filename)
+    branch = admin_branch(request.args.get("branch"))
+    if branch is None:
+        return "Unknown branch", 404
+    file_path = os.path.join(branch.books_dir, filename)
     if os.path.exists(file_path) and filename.endswith(".xlsx"):
         try:
-            return send_from_directory(BOOKS_DIR, filename, as_attachment=True, download_name=filename)
+            return send_from_directory(branch.books_dir, filename, as_attachment=True, download_name=filename)
         except TypeError:
-            return send_from_directory(BOOKS_DIR, filename, as_attachment=True, attachment_filename=filename)
+            return send_from_directory(branch.books_dir, filename, as_attachment=True, attachment_filename=filename)
     return "File not found", 404
 
+@app.route("/export")
+def export_catalog():
+    # 정제된 현재 카탈로그를 CSV/NDJSON으로 흘려보낸다 (export.py). ETag는 카탈로그 버전 + 워크북 해시라
+    # 바뀐 게 없으면 If-None-Match 에 304로 답하고 본문은 만들지 않는다. 버전 번호는 디스크가 비워지면
+    # 1부터 다시 세므로 (무료 배포는 배포마다 비워진다) 해시 없이 번호만으로는 다른 카탈로그와 겹칠 수 있다.
+    #   /export?pw=...&format=ndjson&columns=제목,ISBN&branch=hongdae
+    if request.args.get("pw") != ADMIN_PASSWORD:
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+    branch = admin_branch(request.args.get("branch"))
+    if branch is None:
+        return jsonify({"ok": False, "error": "없는 지점입니다."}), 404
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"ok": False, "error": f"format은 {', '.join(EXPORT_FORMATS)} 중 하나입니다."}), 400
+    try:
+        columns = export_columns(request.args.get("columns", ""))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    try:
+        catalog = branch.catalogs.get()
+    except FileNotFoundError:
+        return jsonify({"ok": False, "error": "업로드된 도서 데이터가 없습니다."}), 503
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+    # 해시를 모르면 ETag를 붙이지 않는다 (버전만으로는 다른 내용에 304를 줄 수 있다).
+    etag = f"{catalog.version}-{catalog.sha256[:12]}" if catalog.sha256 else None
+    # make_conditional 은 Content-Length 를 구하려고 생성기를 끝까지 읽어 버리므로 304는 직접 판단한다.
+    if etag and request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(iter_export(catalog, fmt, columns), mimetype=EXPORT_FORMATS[fmt])
+        resp.headers["Content-Disposition"] = f"attachment; filename=books-{branch.id}-v{catalog.version}.{fmt}"
+    if etag:
+        resp.set_etag(etag)
+    resp.cache_control.no_cache = True
+    return resp
+
 @app.route("/deletefile/<path:filename>", methods=["POST"])
 def delete_file(filename):
     if request.args.get("pw") != ADMIN_PASSWORD:
         return jsonify({"success": False, "msg": "권한 없음"}), 401
-    file_path = os.path.join(BOOKS_DIR, filename)
-    if os.path.exists(file_path) and filename.endswith(".xlsx"):
-        os.remove(file_path)
+    branch = admin_branch(request.args.get("branch"))
+    if branch is None:
+        return jsonify({"success": False, "msg": "없는 지점"}), 404
+    with metrics.stage("delete"):
+        deleted = filename.endswith(".xlsx") and delete_workbook(branch.books_dir, filename)
+    if deleted:
+        with metrics.stage("reload"):
+            branch.reload()
         return jsonify({"success": True})
     return jsonify({"success": False, "msg": "File not found"}), 404
 
 @app.route("/uploaded_img")
 def uploaded_img():
-    for ext in [".jpg", ".jpeg", ".png"]:
-        p = os.path.join(BOOKS_DIR, IMAGE_BASENAME + ext)
-        if os.path.exists(p):
-            mime = "image/jpeg" if ext in [".jpg", ".jpeg"] else "image/png"
-            return send_file(p, mimetype=mime)
-    return "No image", 404
-
-# ===================== 앱 시작 (waitress) =====================
+    # 고정 URL이라 오래 캐시하지 않고, 해시 ETag로 재검증(304)만 하게 한다.
+    image = image_store.current()
+    if image is None:
+        return "No image", 404
+    resp = send_file(image.path("original"), mimetype=image.mimetype("original"),
+                     etag=image.hash, max_age=0, conditional=True)
+    resp.cache_control.no_cache = True
+    return resp
+
+@app.route("/img/<digest>/<name>")
+def image_variant(digest, name):
+    # URL에 이미지 해시가 들어 있으므로 내용이 바뀔 일이 없어 immutable로 캐시한다.
+    image = image_store.current()
+    if image is None or image.hash != digest or (name != "original" and name not in image.variants):
+        return "No image", 404
+    resp = send_file(image.path(name), mimetype=image.mimetype(name),
+                     etag=name if name != "original" else digest, max_age=IMAGE_MAX_AGE, conditional=True)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
+# ===================== 앱 시작 =====================
+# 운영: gunicorn -c gunicorn.conf.py app:app  (CPU 수만큼 워커 프로세스, --preload 로 카탈로그 미리 적재)
+# 단일 프로세스(윈도우 등): python app.py  (waitress, 같은 스레드 수와 연결 제한)
 if __name__ == "__main__":
     from waitress import serve
     port = int(os.environ.get("PORT", 5000))
-    serve(app, host="0.0.0.0", port=port)
+    if serving.warm_up_enabled(preload=False):
+        warm_up()
+    serve(app, host="0.0.0.0", port=port, threads=serving.thread_count(),
+          connection_limit=serving.CONNECTION_LIMIT, backlog=serving.BACKLOG)
@@ -0,0 +1,75 @@
+import os
+import random
+import openpyxl
+
+# ===================== 합성 도서 카탈로그 =====================
+# 벤치마크용 엑셀을 만든다. 네트워크나 실제 데이터 없이, 시드만 같으면 늘 같은 파일이 나온다.
+# 만화방 목록처럼 시리즈 제목이 여러 번 겹치고, 권수/위치에 숫자·문자·빈칸이 섞이도록 만든다.
+SERIES = [
+    "원피스", "나루토", "블리치", "진격의 거인", "귀멸의 칼날", "주술회전", "슬램덩크", "드래곤볼",
+    "명탐정 코난", "강철의 연금술사", "헌터x헌터", "나의 히어로 아카데미아", "체인소 맨", "스파이 패밀리",
+    "하이큐", "원펀맨", "베르세르크", "기생수", "몬스터", "20세기 소년", "바람의 검심", "유유백서",
+    "신의 탑", "나 혼자만 레벨업", "외모지상주의", "열혈강호", "식객", "미생", "이끼", "타짜",
+]
+WORDS = [
+    "바다", "하늘", "소년", "소녀", "전설", "마법", "검", "왕", "학교", "도시", "밤", "별", "꿈", "용",
+    "기사", "탐정", "요리", "야구", "축구", "농구", "사랑", "전쟁", "여행", "시간", "비밀", "숲", "불꽃",
+    "얼음", "바람", "그림자", "빛", "거인", "괴물", "천사", "악마", "영웅", "형제", "자매", "친구", "고양이",
+]
+SUFFIXES = ["", "", "", " 완전판", " 애장판", " 외전", " 리마스터", " 2부", " 신장판"]
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류전홍"
+GIVEN = "민서지현우진수영준호은하연도윤성재예주원태희동혁소"
+JAPANESE = ["오다 에이치로", "키시모토 마사시", "쿠보 타이토", "이사야마 하지메", "토리야마 아키라",
+            "아오야마 고쇼", "아라카와 히로무", "토가시 요시히로", "이노우에 다케히코", "우라사와 나오키"]
+SHELVES = "ABCDEFGH"
+
+def random_title(rng):
+    if rng.random() < 0.6:
+        title = rng.choice(SERIES)
+    else:
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        if rng.random() < 0.3:
+            title += "의 " + rng.choice(WORDS)
+    return title + rng.choice(SUFFIXES)
+
+def random_author(rng):
+    if rng.random() < 0.3:
+        return rng.choice(JAPANESE)
+    return rng.choice(SURNAMES) + "".join(rng.choice(GIVEN) for _ in range(2))
+
+def random_isbn(rng):
+    # 978/979-89/11 로 시작하는 13자리, 체크 숫자까지 맞춘다.
+    body = rng.choice(["97889", "97911"]) + "".join(str(rng.randrange(10)) for _ in range(7))
+    check = (10 - sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body)) % 10) % 10
+    return body + str(check)
+
+def random_row(rng):
+    volume = rng.choice([rng.randint(1, 120), rng.randint(1, 30), None, "완결", "12.0", "없음"])
+    isbn = random_isbn(rng) if rng.random() > 0.05 else None
+    location = rng.choice([
+        f"{rng.choice(SHELVES)}-{rng.randint(1, 12)}",
+        rng.randint(1, 40),
+        f"만화 {rng.randint(1, 30)}",
+        None,
+    ])
+    return [random_title(rng), volume, random_author(rng), isbn, location]
+
+def make_catalog(path, rows, seed=0):
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["제목", "최종권수", "저자", "ISBN", "위치"])
+    for _ in range(rows):
+        ws.append(random_row(rng))
+    tmp = path + ".part"
+    wb.save(tmp)
+    os.replace(tmp, path)
+    return path
+
+def cached_catalog(cache_dir, rows, seed=0):
+    # 10만 행 엑셀은 만드는 데만 수십 초가 걸려서, 같은 (행 수, 시드)는 한 번만 만든다.
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"books_{rows}_{seed}.xlsx")
+    if not os.path.exists(path):
+        make_catalog(path, rows, seed)
+    return path
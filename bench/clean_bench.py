@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog import clean_books, clean_int_like, read_workbook, NULL_TOKENS
+
+# ===================== 정제(clean_books) 벤치마크 =====================
+# 합성 카탈로그(read_workbook 결과)로 예전 셀 단위 구현과 지금 구현의 정제 시간을 잰다.
+# 두 구현의 결과가 같은지는 tests/test_catalog.py 가 무작위 표로 확인한다.
+#   python bench/clean_bench.py --sizes 10000 100000
+DEFAULT_SIZES = (10000, 100000)
+DEFAULT_REPEAT = 5
+
+def legacy_clean_books(df):
+    # 셀마다 파이썬 함수를 부르던 예전 구현 (비교 기준)
+    df = df.fillna('')
+    df = df.apply(lambda col: col.map(lambda x: '' if (isinstance(x, str) and x.strip().lower() in NULL_TOKENS) else x))
+    for col in ['최종권수', '위치']:
+        df[col] = df[col].apply(clean_int_like)
+    return df
+
+def best_of(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return min(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="clean_books 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "dodobook-bench"))
+    parser.add_argument("--out", help="결과 JSON 경로 (생략하면 표준 출력)")
+    args = parser.parse_args(argv)
+
+    from catalog_gen import cached_catalog
+
+    sizes = []
+    for rows in args.sizes:
+        raw = read_workbook(cached_catalog(args.cache_dir, rows, args.seed))
+        legacy = best_of(lambda: legacy_clean_books(raw), args.repeat)
+        current = best_of(lambda: clean_books(raw), args.repeat)
+        sizes.append({"rows": rows, "legacy_s": round(legacy, 4), "clean_s": round(current, 4),
+                      "speedup": round(legacy / current, 2)})
+        print(f"[clean] {rows} rows {legacy:.3f}s -> {current:.3f}s", file=sys.stderr)
+
+    text = json.dumps({"seed": args.seed, "sizes": sizes}, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from search_bench import summarize
+
+# ===================== 동시 검색 부하 테스트 =====================
+# 합성 카탈로그를 게시한 BOOKS_DIR로 실제 서버(gunicorn 설정 그대로, 또는 waitress)를 띄우고,
+# 여러 클라이언트가 keep-alive 연결로 /api/search 를 계속 부를 때의 처리량과 지연 시간을 잰다.
+# 클라이언트는 서버와 CPU를 나눠 쓰므로 여러 프로세스로 나눠 돌린다.
+#   python bench/load_test.py --rows 100000 --clients 1 8 32 64 --duration 10
+QUERIES = ["원피스", "진격의 거인", "귀멸 칼날", "ㅈㄱㅇㄱㅇ", "저자:오다", "나루토", "1", "리마스터",
+           "슬램덩크 완전판", "존재하지않는책제목", "하이큐", "위치:12", "미생", "체인소 맨"]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(kind, books_dir, port, env_overrides):
+    env = dict(os.environ, BOOKS_DIR=books_dir, PORT=str(port), **env_overrides)
+    if kind == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", "app:app"]
+    else:
+        cmd = [sys.executable, "app.py"]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(proc.stderr.read().decode("utf-8", "replace"))
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/api/search?" + urlencode({"q": "원피스"}))
+            if conn.getresponse().status in (200, 503):
+                conn.close()
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+def client_proc(port, threads, duration, seed):
+    # 한 프로세스 안에서 threads개 클라이언트가 duration초 동안 검색을 반복한다.
+    latencies, statuses, lock = [], {}, threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(n):
+        rng = random.Random(seed * 1000 + n)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local, codes = [], {}
+        while time.perf_counter() < stop_at:
+            path = "/api/search?" + urlencode({"q": rng.choice(QUERIES)})
+            started = time.perf_counter()
+            try:
+                conn.request("GET", path, headers={"Accept-Encoding": "gzip, br"})
+                resp = conn.getresponse()
+                resp.read()
+                status = resp.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                status = "error"
+            local.append(time.perf_counter() - started)
+            codes[status] = codes.get(status, 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            for k, v in codes.items():
+                statuses[k] = statuses.get(k, 0) + v
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return latencies, statuses
+
+def run_level(port, clients, procs, duration):
+    procs = max(1, min(procs, clients))
+    split = [clients // procs + (1 if i < clients % procs else 0) for i in range(procs)]
+    with ProcessPoolExecutor(max_workers=procs) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(client_proc, [port] * procs, split, [duration] * procs, range(procs)))
+        elapsed = time.perf_counter() - started
+    latencies = [x for lat, _ in results for x in lat]
+    statuses = {}
+    for _, codes in results:
+        for k, v in codes.items():
+            statuses[str(k)] = statuses.get(str(k), 0) + v
+    ok = statuses.get("200", 0)
+    return dict(summarize(latencies), clients=clients, ok_per_s=round(ok / elapsed, 1), statuses=statuses)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="동시 검색 부하 테스트")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--client-procs", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--server", choices=["gunicorn", "waitress"], default="gunicorn")
+    parser.add_argument("--result-cache", action="store_true", help="검색 결과 캐시를 켠다 (기본은 끔)")
+    parser.add_argument("--env", nargs="*", default=[], help="서버에 넘길 KEY=VALUE (예: WEB_WORKERS=2)")
+    parser.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "dodobook-bench"))
+    parser.add_argument("--out", help="결과 JSON 경로 (생략하면 표준 출력)")
+    args = parser.parse_args(argv)
+
+    from catalog import publish_workbook
+    from catalog_gen import cached_catalog
+    import serving
+
+    overrides = dict(item.split("=", 1) for item in args.env)
+    if not args.result_cache:
+        overrides.setdefault("RESULT_CACHE_BYTES", "0")
+    workbook = cached_catalog(args.cache_dir, args.rows, args.seed)
+    with tempfile.TemporaryDirectory(prefix="dodobook-load-") as books_dir:
+        with open(workbook, "rb") as f:
+            publish_workbook(books_dir, f, "books.xlsx")
+        port = free_port()
+        proc = start_server(args.server, books_dir, port, overrides)
+        try:
+            levels = []
+            for clients in args.clients:
+                level = run_level(port, clients, args.client_procs, args.duration)
+                print(f"[load] {clients:4d} clients {level['ok_per_s']:8.1f} ok/s p50 {level['p50_ms']:.1f}ms "
+                      f"p95 {level['p95_ms']:.1f}ms {level['statuses']}", file=sys.stderr)
+                levels.append(level)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    result = {
+        "meta": {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "server": args.server, "rows": args.rows,
+                 "cpu_count": serving.CPU_COUNT, "duration_s": args.duration, "env": overrides,
+                 "result_cache": args.result_cache},
+        "levels": levels,
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# ===================== 검색 벤치마크 =====================
+# 합성 카탈로그(기본 1천/1만/10만 행)로 적재와 검색 시간을 재서 JSON으로 남긴다.
+# 검색은 Flask 테스트 클라이언트로 실제 라우트를 부르므로 네트워크 없이 돌아간다.
+#   python bench/search_bench.py --out before.json
+#   python bench/search_bench.py --out after.json --compare before.json
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_REPEAT = 30
+BROWSER_ENCODING = "gzip, deflate, br"
+WARMUP = 3
+
+# (이름, 경로, 파라미터). 여러 단어 검색은 붙어 있는 구절과 떨어진 단어를 둘 다 잰다.
+SCENARIOS = [
+    ("index_post_hit", "POST /", {"keyword": "원피스"}),
+    ("api_hit", "/api/search", {"q": "원피스"}),
+    ("api_hit_no_total", "/api/search", {"q": "원피스", "total": "0"}),
+    ("api_hit_deep_page", "/api/search", {"q": "원피스", "offset": "400"}),
+    ("index_post_broad", "POST /", {"keyword": "1"}),
+    ("api_broad_max_page", "/api/search", {"q": "1", "limit": "200"}),
+    ("api_miss", "/api/search", {"q": "존재하지않는책제목"}),
+    ("api_choseong", "/api/search", {"q": "ㅈㄱㅇㄱㅇ"}),
+    ("api_substring_rare", "/api/search", {"q": "리마스터"}),
+    ("api_multi_phrase", "/api/search", {"q": "진격의 거인"}),
+    ("api_multi_terms", "/api/search", {"q": "귀멸 칼날"}),
+    ("api_multi_author", "/api/search", {"q": "오다 에이치로 원피스"}),
+    ("api_fuzzy_typo", "/api/search", {"q": "진격의 거잉"}),
+    ("api_fuzzy_short", "/api/search", {"q": "나르토"}),
+    ("suggest", "/api/suggest", {"q": "진ㄱ"}),
+]
+
+def summarize(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "p50_ms": round(ms[len(ms) // 2], 4),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 4),
+        "max_ms": round(ms[-1], 4),
+    }
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+def request(client, path, params, encoding):
+    headers = {"Accept-Encoding": encoding}
+    if path.startswith("POST "):
+        return client.post(path[5:], data=params, headers=headers)
+    return client.get(path + "?" + urlencode(params), headers=headers)
+
+def result_count(resp):
+    if resp.mimetype != "application/json":
+        return None
+    if resp.content_encoding:
+        return None
+    body = resp.get_json()
+    if "total" in body:
+        return body["total"]
+    return len(body.get("rows", body.get("suggestions", [])))
+
+def bench_size(app_module, workbook, rows, work_dir, repeat, encoding):
+    from catalog import CatalogCache, publish_workbook
+
+    books_dir = os.path.join(work_dir, f"books_{rows}")
+    os.makedirs(books_dir)
+    load = {}
+    # 게시: 엑셀 파싱 + 정제 + 검색 블롭 + 스냅샷 쓰기 (관리자 업로드 한 번에 해당)
+    with open(workbook, "rb") as f:
+        load["publish_s"], _ = timed(lambda: publish_workbook(books_dir, f, "books.xlsx"))
+    # 콜드 적재: 새 워커가 스냅샷을 처음 여는 비용
+    cache = CatalogCache(books_dir)
+    load["cold_open_s"], catalog = timed(cache.get)
+    load["first_search_s"], _ = timed(lambda: catalog.index.search_page("원피스", 0, 50))
+    load["to_frame_s"], frame = timed(catalog.to_frame)
+    load = {k: round(v, 4) for k, v in load.items()}
+    load["rows"] = len(frame)
+    load["mapped_bytes"] = catalog.nbytes
+
+    # 라우트가 보는 캐시를 이 크기의 카탈로그로 바꿔 끼운다. 크기마다 새 디렉터리라 버전 번호가 같으므로
+    # 결과 캐시는 저절로 비워지지 않는다 (이전 크기의 행 번호가 나오지 않게 직접 비운다).
+    app_module.branches.default.catalogs = cache
+    app_module.branches.default.results.clear()
+    client = app_module.app.test_client()
+    search = {}
+    for name, path, params in SCENARIOS:
+        count = result_count(request(client, path, params, "identity"))
+        resp = request(client, path, params, encoding)
+        if resp.status_code != 200:
+            raise RuntimeError(f"{name}: HTTP {resp.status_code}")
+        for _ in range(WARMUP):
+            request(client, path, params, encoding)
+        samples = [timed(lambda: request(client, path, params, encoding))[0] for _ in range(repeat)]
+        # bytes는 전송되는 본문 크기 (압축됐으면 압축 후 크기)
+        search[name] = dict(summarize(samples), results=count, bytes=len(resp.get_data()),
+                            encoding=resp.content_encoding or "identity")
+    return {"rows": rows, "workbook_bytes": os.path.getsize(workbook), "load": load, "search": search}
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(current, baseline):
+    # 크기·지표별로 (이전 → 지금, 배율)을 출력한다. 배율이 1보다 작으면 빨라진 것.
+    old_sizes = {entry["rows"]: entry for entry in baseline["sizes"]}
+    lines = []
+    for entry in current["sizes"]:
+        old = old_sizes.get(entry["rows"])
+        if old is None:
+            continue
+        lines.append(f"== {entry['rows']} rows")
+        for key, value in entry["load"].items():
+            if key.endswith("_s") and old["load"].get(key):
+                lines.append(f"  {key:24s} {old['load'][key]:10.4f} -> {value:10.4f}  x{value / old['load'][key]:.2f}")
+        for name, stats in entry["search"].items():
+            before = old["search"].get(name)
+            if before and before["p50_ms"]:
+                lines.append(f"  {name:24s} {before['p50_ms']:10.4f} -> {stats['p50_ms']:10.4f}  x{stats['p50_ms'] / before['p50_ms']:.2f} (p50 ms)")
+            if before and before.get("bytes"):
+                lines.append(f"  {'':24s} {before['bytes']:10d} -> {stats['bytes']:10d}  x{stats['bytes'] / before['bytes']:.2f} (bytes)")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="도서 검색 벤치마크 (오프라인)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--encoding", default=BROWSER_ENCODING,
+                        help="보낼 Accept-Encoding (압축 전 크기를 보려면 identity)")
+    parser.add_argument("--result-cache", action="store_true",
+                        help="검색 결과 캐시를 켠 채로 잰다 (기본은 끄고 검색 자체를 잰다)")
+    parser.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "dodobook-bench"),
+                        help="합성 엑셀을 보관할 디렉터리 (다음 실행 때 재사용)")
+    parser.add_argument("--out", help="결과 JSON 경로 (생략하면 표준 출력)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    from catalog_gen import cached_catalog
+
+    with tempfile.TemporaryDirectory(prefix="dodobook-bench-") as work_dir:
+        # app은 import 시점에 BOOKS_DIR을 만들므로 먼저 임시 디렉터리로 돌려 둔다.
+        os.environ["BOOKS_DIR"] = os.path.join(work_dir, "app_books")
+        if not args.result_cache:
+            # 같은 검색을 반복해서 재므로, 캐시를 켜 두면 두 번째부터는 캐시 조회 시간만 나온다.
+            os.environ["RESULT_CACHE_BYTES"] = "0"
+        import app as app_module
+
+        sizes = []
+        for rows in args.sizes:
+            generated, workbook = timed(lambda: cached_catalog(args.cache_dir, rows, args.seed))
+            print(f"[bench] {rows} rows ({generated:.1f}s to prepare workbook)", file=sys.stderr)
+            sizes.append(bench_size(app_module, workbook, rows, work_dir, args.repeat, args.encoding))
+
+    result = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "accept_encoding": args.encoding,
+            "result_cache": args.result_cache,
+        },
+        "sizes": sizes,
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(compare(result, json.load(f)), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import heapq
+import os
+import re
+import metrics
+from catalog import CatalogCache, UploadList
+from hangul import decompose_marked
+from ingest import IngestJobs
+from result_cache import ResultCache, MATCH_KINDS
+
+# ===================== 지점 =====================
+# 한 프로세스가 여러 지점의 카탈로그를 함께 들고 있다. 지점마다 BOOKS_DIR 아래 자기 디렉터리와
+# catalog.json(버전), 스냅샷, 검색 결과 캐시, 업로드 목록, 적재 작업이 따로 있다.
+#   BRANCHES="main=본점,hongdae=홍대점"
+# 첫 지점은 BOOKS_DIR 자체를 쓰므로 지점이 하나뿐이던 기존 데이터가 그대로 첫 지점이 된다.
+# 나머지는 BOOKS_DIR/branches/<id> 에 둔다. 비워 두면 "main" 한 지점이다.
+BRANCH_DIR = "branches"
+DEFAULT_BRANCHES = "main=본점"
+ALL = "all"
+_BRANCH_ID = re.compile(r"^[a-z0-9_-]{1,32}$")
+_MATCH_RANK = {kind: rank for rank, kind in enumerate(MATCH_KINDS)}
+
+def parse_branches(spec, books_dir):
+    # "id=이름,id2=이름2" -> [(id, 이름, 디렉터리)]. 이름을 빼면 id를 그대로 이름으로 쓴다.
+    result = []
+    for part in (p.strip() for p in (spec or DEFAULT_BRANCHES).split(",")):
+        if not part:
+            continue
+        branch_id, _, name = part.partition("=")
+        branch_id = branch_id.strip().lower()
+        if not _BRANCH_ID.match(branch_id) or branch_id == ALL:
+            raise ValueError(f"지점 id는 영문 소문자·숫자·-·_ 로만 쓸 수 있습니다: {branch_id!r}")
+        if any(branch_id == other for other, _, _ in result):
+            raise ValueError(f"지점 id가 겹칩니다: {branch_id!r}")
+        directory = books_dir if not result else os.path.join(books_dir, BRANCH_DIR, branch_id)
+        result.append((branch_id, name.strip() or branch_id, directory))
+    return result
+
+class Branch:
+    def __init__(self, branch_id, name, books_dir, loader=None, cache_bytes=0, cache_ttl=0):
+        os.makedirs(books_dir, exist_ok=True)
+        self.id = branch_id
+        self.name = name
+        self.books_dir = books_dir
+        self.catalogs = CatalogCache(books_dir, loader=loader)
+        self.results = ResultCache(cache_bytes, cache_ttl)
+        self.uploads = UploadList(books_dir)
+        self.ingest = IngestJobs(books_dir, on_published=self.reload)
+
+    def reload(self):
+        # 게시/삭제 직후: 이 워커는 바로 새 버전을 읽는다. 다른 워커의 결과 캐시는 버전이 바뀌면 비워진다.
+        self.catalogs.reload()
+        self.results.clear()
+
+    def search_page(self, catalog, keyword, offset, limit, with_total=True, fuzzy=True):
+        return self.results.search_page(catalog, keyword, offset, limit, with_total, fuzzy)
+
+    def stats(self):
+        # 지점별 메모리(mmap 된 스냅샷, 결과 캐시)와 적재 시간
+        return {"id": self.id, "name": self.name, **self.catalogs.stats(), "result_cache": self.results.stats()}
+
+class Branches:
+    def __init__(self, branches, pool):
+        # branches: [Branch], pool: 지점별 검색을 나눠 돌릴 실행기 (serving.BoundedExecutor)
+        self._branches = {b.id: b for b in branches}
+        self.default = branches[0]
+        self.pool = pool
+
+    def __iter__(self):
+        return iter(self._branches.values())
+
+    def __len__(self):
+        return len(self._branches)
+
+    def get(self, branch_id):
+        # 없는 id면 None. 비어 있으면 첫 지점.
+        if not branch_id:
+            return self.default
+        return self._branches.get(branch_id)
+
+    def select(self, branch_id):
+        # 검색 대상 지점 목록. "all"(또는 빈 값)은 전 지점, 모르는 id는 KeyError.
+        if not branch_id or branch_id == ALL:
+            return list(self._branches.values())
+        return [self._branches[branch_id]]
+
+    def versions(self):
+        return tuple(b.catalogs.version() for b in self)
+
+    def catalogs(self, selected):
+        # 지점별 현재 카탈로그를 꺼낸다 (필요하면 스냅샷 적재). 카탈로그가 없는 지점은 건너뛰고,
+        # 하나도 없으면 첫 오류를 다시 던진다. 요청 계측에서는 "catalog" 단계로 잡힌다.
+        targets, error = [], None
+        with metrics.stage("catalog"):
+            for branch in selected:
+                try:
+                    targets.append((branch, branch.catalogs.get()))
+                except (FileNotFoundError, ValueError) as e:
+                    error = error or e
+        if not targets:
+            raise error or FileNotFoundError("업로드된 도서 데이터가 없습니다!")
+        return targets
+
+    def search_page(self, selected, keyword, offset, limit, with_total=True):
+        # 지점별 검색을 실행기에 한꺼번에 넣고, 일치 종류 순서(완전 → 접두 → 초성 → 부분)로 합친다.
+        # 같은 종류 안에서는 지점 순서를 지킨다. (지점, 카탈로그, 행 번호, 일치 종류) 목록과
+        # 전체 건수, 다음 페이지 유무를 돌려준다. 카탈로그가 없는 지점은 건너뛴다.
+        targets = self.catalogs(selected)
+        with metrics.stage("match"):
+            return self._search_page(targets, keyword, offset, limit, with_total)
+
+    def _search_page(self, targets, keyword, offset, limit, with_total):
+        if len(targets) == 1:
+            branch, catalog = targets[0]
+            page, total, has_more = self.pool.run(branch.search_page, catalog, keyword, offset, limit, with_total)
+            return [(branch, catalog, row, match) for row, match in page], total, has_more
+
+        # 합친 순서의 [offset, offset+limit) 구간을 만들려면 지점마다 앞에서부터 그만큼이 필요하다.
+        # 오타 검색은 지점별로 하지 않는다 (한 지점의 비슷한 제목이 다른 지점의 정확한 결과에 섞이지 않게).
+        futures = [self.pool.submit(branch.search_page, catalog, keyword, 0, offset + limit, with_total, False)
+                   for branch, catalog in targets]
+        results = [future.result() for future in futures]
+        if not any(page for page, _, _ in results):
+            # 어느 지점에도 맞는 책이 없을 때만 전 지점의 오타 검색 결과를 합쳐 보여 준다.
+            futures = [self.pool.submit(catalog.index.fuzzy_matches, keyword) for _, catalog in targets]
+            results = [(matches, len(matches), False) for matches in (future.result() for future in futures)]
+        streams = [[(branch, catalog, row, match) for row, match in page]
+                   for (branch, catalog), (page, _, _) in zip(targets, results)]
+        merged = list(heapq.merge(*streams, key=lambda item: _MATCH_RANK[item[3]]))
+        total = sum(t for _, t, _ in results) if with_total else None
+        has_more = len(merged) > offset + limit or any(more for _, _, more in results)
+        return merged[offset:offset + limit], total, has_more
+
+    def suggest(self, selected, prefix, n):
+        # 지점별 자동완성을 모아 겹치는 항목을 빼고 자모 순서로 앞의 n개
+        targets = self.catalogs(selected)
+        seen, merged = set(), []
+        with metrics.stage("suggest"):
+            for _, catalog in targets:
+                for item in catalog.suggester.suggest(prefix, n):
+                    key = (item["text"], item["field"])
+                    if key not in seen:
+                        seen.add(key)
+                        merged.append(item)
+            if len(targets) > 1:
+                merged.sort(key=lambda item: decompose_marked(item["text"].lower()))
+        return merged[:n]
@@ -0,0 +1,724 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+import shutil
+import numpy as np
+# pandas/openpyxl 은 엑셀을 읽고 정제할 때만 쓰므로 그 함수 안에서 import 한다.
+# 워커 시작과 검색은 스냅샷만 열기 때문에 두 모듈을 읽는 시간(약 0.5초)을 치르지 않는다.
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 안의 스레드 락만 건다.
+    fcntl = None
+from search_engine import SearchIndex, TextBlob, Autocomplete, SEARCH_COLUMNS, SEP_B
+from fuzzy import FuzzyIndex
+from snapshot import write_snapshot, open_snapshot
+from catalog_diff import diff_catalogs
+from serving import Busy
+
+REQUIRED_COLUMNS = ["제목", "최종권수", "저자", "ISBN", "위치"]
+NULL_TOKENS = ('nan', 'none', 'null', '없음')
+SNAPSHOT_SUFFIX = ".snap"
+# 블롭 내용의 모양이 바뀌면 올린다. 다른 형식의 스냅샷은 원본 엑셀에서 다시 만든다.
+SNAPSHOT_FORMAT = 4
+UPLOAD_CHUNK = 1024 * 1024
+PROGRESS_EVERY = 1000  # 진행률 콜백 간격(행)
+MANIFEST_NAME = "catalog.json"
+LOCK_NAME = ".catalog.lock"
+
+# ===================== 엑셀 로드 =====================
+def clean_int_like(x):
+    if x == '' or x is None: return ''
+    s = str(x).strip()
+    try:
+        f = float(s)
+        return str(int(f)) if f.is_integer() else s
+    except (ValueError, TypeError):
+        return s
+
+# 고유값들을 \x00으로 이은 문자열에서 NULL_TOKENS 모양인 칸을 정규식 한 번으로 찾는다.
+_NULL_TOKEN_CELL = re.compile(r"\x00(\s*(?:%s)\s*)(?=\x00)" % "|".join(map(re.escape, NULL_TOKENS)),
+                              re.IGNORECASE)
+
+def _mask_null_tokens(col):
+    # 문자열 셀 중 NULL_TOKENS(앞뒤 공백·대소문자 무시)를 빈칸으로. 같은 값이 많이 겹치므로 고유값만 훑고,
+    # 걸린 값들을 isin으로 한 번에 지운다 (문자열은 숫자 셀과 같다고 비교되지 않는다).
+    import pandas as pd
+    from pandas.api.types import infer_dtype
+    uniques = pd.unique(col.to_numpy())
+    if infer_dtype(uniques, skipna=False) != "string":
+        uniques = [u for u in uniques if isinstance(u, str)]
+    joined = "\x00" + "\x00".join(uniques) + "\x00"
+    # 정규식은 후보만 고른다. 값 안에 \x00이 있으면 조각이 잘못 걸릴 수 있어 원래 규칙으로 한 번 더 본다.
+    tokens = {m.group(1) for m in _NULL_TOKEN_CELL.finditer(joined)}
+    tokens = [t for t in tokens if t.strip().lower() in NULL_TOKENS]
+    values = col.to_numpy(dtype=object, copy=True)
+    if tokens:
+        values[col.isin(tokens).to_numpy()] = ''
+    # Series.map 과 같은 dtype이 되도록 (전부 문자열이면 문자열, 전부 숫자면 숫자 dtype) 다시 추론한다.
+    return pd.Series(values, index=col.index, name=col.name).infer_objects()
+
+def clean_int_like_column(col):
+    # clean_int_like(x)는 str(x)에만 달려 있으므로, 문자열로 바꾼 뒤 고유값마다 한 번씩만 계산해 펼친다.
+    # (숫자 셀은 1, 1.0, True 가 같은 값으로 묶이므로 str로 먼저 바꾼 다음에 factorize 해야 한다.)
+    # (날짜 컬럼은 astype(str)이 "2024-01-01"로 줄이므로 파이썬 객체로 꺼내서 str 한다.)
+    import pandas as pd
+    codes, uniques = pd.factorize(pd.Series(col.to_numpy(dtype=object), dtype=object).astype(str))
+    cleaned = np.array([clean_int_like(u) for u in uniques], dtype=object)
+    return pd.Series(cleaned[codes], index=col.index, name=col.name)
+
+def clean_books(df):
+    import pandas as pd
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"엑셀에 {missing} 컬럼이 없습니다!")
+
+    # 셀마다 파이썬 함수를 부르지 않고 컬럼 단위로 정리한다 (파이썬 코드는 고유값에서만 돈다).
+    df = df.fillna('')
+    df = pd.DataFrame({c: _mask_null_tokens(df[c]) for c in df.columns}, index=df.index)
+    for col in ['최종권수', '위치']:
+        df[col] = clean_int_like_column(df[col])
+    return df
+
+def read_workbook(path, progress=None):
+    # openpyxl read-only 모드로 첫 시트를 한 행씩 읽는다 (pd.read_excel처럼 통째로 올리지 않는다).
+    # progress(읽은 행 수, 전체 행 수 또는 None)는 PROGRESS_EVERY 행마다 불린다.
+    # 업로드 임시 파일은 확장자가 .tmp 라서 경로 대신 파일 객체로 넘긴다.
+    import openpyxl
+    with open(path, "rb") as fh:
+        try:
+            wb = openpyxl.load_workbook(fh, read_only=True, data_only=True)
+        except Exception as e:
+            raise ValueError(f"엑셀 파일을 읽을 수 없습니다: {e}") from e
+        try:
+            return _read_first_sheet(wb.worksheets[0], progress)
+        finally:
+            wb.close()
+
+def _read_first_sheet(ws, progress):
+    import pandas as pd
+    total = ws.max_row - 1 if ws.max_row else None
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("엑셀에 데이터가 없습니다!")
+    header = ["" if h is None else str(h).strip() for h in header]
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"엑셀에 {missing} 컬럼이 없습니다!")
+    wanted = [(c, header.index(c)) for c in REQUIRED_COLUMNS]
+    data = {c: [] for c in REQUIRED_COLUMNS}
+    count = 0
+    for row in rows:
+        if all(v is None for v in row):
+            continue
+        for c, i in wanted:
+            v = row[i] if i < len(row) else None
+            # ISBN은 숫자 셀이어도 문자열로 다룬다 (pd.read_excel dtype=str 과 같은 처리).
+            data[c].append(str(v) if c == "ISBN" and v is not None else v)
+        count += 1
+        if progress and count % PROGRESS_EVERY == 0:
+            progress(count, total)
+    if progress:
+        progress(count, count)
+    return pd.DataFrame(data, columns=REQUIRED_COLUMNS, dtype=object)
+
+def load_books(path, progress=None):
+    return clean_books(read_workbook(path, progress))
+
+# ===================== 스냅샷 =====================
+# 업로드 시점에 엑셀을 한 번만 검증·정제해서 옆에 <파일명>.snap 으로 남겨 둔다.
+# 이후 워커 시작과 검색은 스냅샷을 mmap만 하므로 openpyxl 파싱을 다시 하지 않는다.
+def snapshot_path(xlsx_path):
+    return xlsx_path + SNAPSHOT_SUFFIX
+
+CATALOG_BLOBS = ([f"col:{c}" for c in SEARCH_COLUMNS] + list(SearchIndex.BLOBS) + list(Autocomplete.BLOBS)
+                 + list(FuzzyIndex.BLOBS))
+
+ROW_BLOBS = [f"col:{c}" for c in SEARCH_COLUMNS] + list(SearchIndex.ROW_BLOBS)  # 행마다 값이 하나씩인 블롭
+
+def frame_blobs(frame):
+    blobs = {f"col:{c}": TextBlob.from_strings(frame[c].tolist()) for c in SEARCH_COLUMNS}
+    blobs.update(SearchIndex.from_frame(frame).blobs())
+    return blobs
+
+def build_blobs(path, progress=None, previous=None, base=None):
+    # (블롭, 문자열 DataFrame, 변경 보고서 또는 None)을 돌려준다.
+    # previous(현재 카탈로그의 블롭)를 주면 새 행을 이전 행과 맞춰 보고, 그대로인 행은 이전 블롭의
+    # 바이트를 옮겨 담고 추가·변경된 행만 소문자화·자모·초성 분해를 한다.
+    # 제목/저자 집합이 같으면 자동완성도 다시 정렬하지 않는다.
+    import pandas as pd
+    df = load_books(path, progress)
+    frame = pd.DataFrame({c: df[c].map(str) for c in SEARCH_COLUMNS})
+    titles, authors = frame["제목"].tolist(), frame["저자"].tolist()
+    if previous is None:
+        blobs = frame_blobs(frame)
+        blobs.update(Autocomplete.from_values(titles, authors).blobs())
+        blobs.update(fuzzy_blobs(blobs))
+        return blobs, frame, None
+
+    changes, same = diff_catalogs({c: previous[f"col:{c}"].values() for c in SEARCH_COLUMNS},
+                                  {c: frame[c].tolist() for c in SEARCH_COLUMNS}, base)
+    changed = [i for i, j in enumerate(same) if j is None]
+    fresh = frame_blobs(frame.iloc[changed])
+    runs = _row_runs(same)
+    blobs = {}
+    for name in ROW_BLOBS:
+        sources = (fresh[name], previous[name])
+        blobs[name] = splice_blob([(sources[kept], lo, hi) for kept, lo, hi in runs])
+    blobs.update(zip(SearchIndex.ISBN_BLOBS, SearchIndex.isbn_table(blobs["isbn"])))
+    suggester = Autocomplete(**{name: previous[name] for name in Autocomplete.BLOBS})
+    blobs.update(Autocomplete.from_values(titles, authors, suggester).blobs())
+    blobs.update(fuzzy_blobs(blobs, previous))
+    return blobs, frame, changes
+
+def fuzzy_blobs(blobs, previous=None):
+    # 오타 검색 인덱스 배열. 행 순서의 제목/저자가 이전 카탈로그와 같으면 (권수·위치만 바뀐 업로드) 그대로 쓴다.
+    titles, authors = blobs["title_jamo"].values(), blobs["author_jamo"].values()
+    if (previous is not None and titles == previous["title_jamo"].values()
+            and authors == previous["author_jamo"].values()):
+        return {name: previous[name] for name in FuzzyIndex.BLOBS}
+    return FuzzyIndex.from_values(titles, authors).blobs()
+
+def _row_runs(same):
+    # same(새 행 -> 이전 행 번호 또는 None)을 (이전 블롭에서인지, 시작 행, 끝 행) 구간들로 묶는다.
+    # 바뀌지 않은 행은 보통 이전 순서 그대로 길게 이어지므로 구간 수는 변경 건수 정도다.
+    runs = []
+    k = 0  # 새로 만든(추가·변경) 행 블롭에서의 위치
+    for j in same:
+        if j is None:
+            if runs and not runs[-1][0]:
+                runs[-1][2] += 1
+            else:
+                runs.append([False, k, k + 1])
+            k += 1
+        elif runs and runs[-1][0] and runs[-1][2] == j:
+            runs[-1][2] += 1
+        else:
+            runs.append([True, j, j + 1])
+    return runs
+
+def splice_blob(segments):
+    # [(블롭, 시작 행, 끝 행)] 구간들을 순서대로 이어 붙인 새 블롭. 바이트는 구간째로 복사하고
+    # 행 시작 오프셋만 새 위치로 옮긴다.
+    chunks, starts = [SEP_B], []
+    pos = 1
+    for blob, lo, hi in segments:
+        first = blob.starts[lo]
+        last = blob.starts[hi] if hi < len(blob.starts) else blob.end  # 끝 행 뒤의 SEP까지
+        chunks.append(blob.data[first:last])
+        starts.append(np.frombuffer(blob.starts, dtype=np.int64)[lo:hi] - first + pos)
+        pos += last - first
+    if not starts:
+        return TextBlob.from_strings([])
+    return TextBlob(b"".join(chunks), array("q", np.concatenate(starts).tobytes()))
+
+def current_catalog_blobs(books_dir):
+    # 매니페스트가 가리키는 현재 카탈로그의 (파일명, 블롭). 없거나 읽을 수 없으면 (None, None).
+    manifest = read_manifest(books_dir)
+    name = manifest.get("current") if manifest else None
+    if not name:
+        return None, None
+    try:
+        snap = open_snapshot(snapshot_path(os.path.join(books_dir, name)))
+        if snap.meta.get("format") != SNAPSHOT_FORMAT:
+            return None, None
+        return name, {blob: snap.blob(blob) for blob in CATALOG_BLOBS}
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+def write_catalog_snapshot(path, blobs, rows):
+    st = os.stat(path)
+    meta = {"source": os.path.basename(path), "mtime_ns": st.st_mtime_ns, "size": st.st_size, "rows": rows,
+            "format": SNAPSHOT_FORMAT}
+    write_snapshot(snapshot_path(path), blobs, meta)
+
+def build_snapshot(path):
+    # 잘못된 워크북이면 ValueError를 그대로 올려 업로드 단계에서 거절하게 한다.
+    blobs, frame, _ = build_blobs(path)
+    write_catalog_snapshot(path, blobs, len(frame))
+    return blobs
+
+def load_catalog_blobs(path, mtime_ns, size):
+    try:
+        snap = open_snapshot(snapshot_path(path))
+        if (snap.meta.get("mtime_ns"), snap.meta.get("size"), snap.meta.get("format")) == (mtime_ns, size, SNAPSHOT_FORMAT):
+            return {name: snap.blob(name) for name in CATALOG_BLOBS}
+    except (OSError, ValueError, KeyError):
+        pass
+    # 예전 업로드라 스냅샷이 없거나 원본이 바뀐 경우: 한 번 파싱해서 스냅샷을 만든다.
+    try:
+        return build_snapshot(path)
+    except OSError:
+        blobs, _, _ = build_blobs(path)
+        return blobs
+
+# ===================== 게시 (publish) =====================
+# 여러 워커가 같은 BOOKS_DIR를 보므로, 워크북은 다음 순서로만 "현재 카탈로그"가 된다.
+#   임시 파일에 저장 + fsync → 검증/스냅샷 → rename → catalog.json 버전 증가(역시 임시 파일 + rename)
+# 워커는 catalog.json을 stat 한 번 해서 바뀌었을 때만 다시 읽는다.
+# 게시/삭제는 BOOKS_DIR의 잠금 파일(flock)로 직렬화해 동시 업로드에도 버전이 꼬이지 않는다.
+_publish_thread_lock = threading.Lock()
+
+@contextmanager
+def file_lock(path):
+    # 여러 워커 프로세스 사이의 배타 잠금. 검색 기록 집계(search_log.py)도 같이 쓴다.
+    with open(path, "a+") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+@contextmanager
+def publish_lock(books_dir):
+    with _publish_thread_lock, file_lock(os.path.join(books_dir, LOCK_NAME)):
+        yield
+
+def _fsync_dir(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_json_atomic(path, data):
+    # 임시 파일에 쓰고 fsync 한 뒤 rename: 읽는 쪽은 이전 내용이나 새 내용 중 하나만 본다.
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".json-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+    _fsync_dir(directory)
+
+def manifest_path(books_dir):
+    return os.path.join(books_dir, MANIFEST_NAME)
+
+def read_manifest(books_dir):
+    try:
+        with open(manifest_path(books_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+# 매니페스트의 "files"는 지금까지 올린 워크북 목록이다.
+#   {이름: {"size", "uploaded_at", "rows", "sha256"}}
+# 게시/삭제가 버전과 함께 한 번의 rename으로 바꾸므로 목록과 현재 카탈로그가 어긋나지 않는다.
+# 목록·최신 파일 찾기·이름 중복 확인은 모두 이 목록만 보고, BOOKS_DIR를 훑지 않는다.
+def _bump_manifest(books_dir, current, files):
+    # publish_lock 안에서만 부른다.
+    manifest = read_manifest(books_dir) or {"version": 0}
+    write_json_atomic(manifest_path(books_dir), {
+        "version": manifest["version"] + 1,
+        "current": current,
+        "published_at": time.time(),
+        "files": files,
+    })
+
+def newest_upload(files):
+    if not files:
+        return None
+    return max(files, key=lambda name: (files[name]["uploaded_at"], name))
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _scan_uploads(books_dir):
+    # 목록이 없는 예전 디렉터리에서 딱 한 번 돈다. 업로드 시각은 파일 수정 시각으로 대신한다.
+    files = {}
+    for name in os.listdir(books_dir):
+        if not name.endswith(".xlsx"):
+            continue
+        path = os.path.join(books_dir, name)
+        st = os.stat(path)
+        rows = None
+        try:
+            snap = open_snapshot(snapshot_path(path))
+            if (snap.meta.get("mtime_ns"), snap.meta.get("size")) == (st.st_mtime_ns, st.st_size):
+                rows = snap.meta.get("rows")
+        except (OSError, ValueError):
+            pass
+        files[name] = {"size": st.st_size, "uploaded_at": st.st_mtime, "rows": rows, "sha256": file_sha256(path)}
+    return files
+
+def _manifest_complete(manifest):
+    # 업로드 목록이 있고 모든 항목에 내용 해시가 있어야 한다 (내보내기 ETag가 해시를 쓴다).
+    return manifest is not None and "files" in manifest and all(
+        entry.get("sha256") for entry in manifest["files"].values())
+
+def _locked_manifest(books_dir):
+    # publish_lock 안에서 현재 매니페스트를 읽는다. 업로드 목록이 없으면 디렉터리를 한 번 훑어 채우고,
+    # 해시가 빠진 예전 항목은 해시만 채운다 (파일이 없어진 항목은 뺀다).
+    # 어느 쪽이든 버전이 올라가 워커들이 새 해시로 다시 읽는다.
+    manifest = read_manifest(books_dir)
+    if manifest is None or "files" not in manifest:
+        files = _scan_uploads(books_dir)
+        current = manifest.get("current") if manifest else None
+        if current not in files:
+            current = newest_upload(files)
+        _bump_manifest(books_dir, current, files)
+        manifest = read_manifest(books_dir)
+    elif not _manifest_complete(manifest):
+        files = {}
+        for name, entry in manifest["files"].items():
+            path = os.path.join(books_dir, name)
+            if entry.get("sha256"):
+                files[name] = entry
+            elif os.path.exists(path):
+                files[name] = {**entry, "sha256": file_sha256(path)}
+        current = manifest.get("current")
+        if current not in files:
+            current = newest_upload(files)
+        _bump_manifest(books_dir, current, files)
+        manifest = read_manifest(books_dir)
+    return manifest
+
+def ensure_manifest(books_dir):
+    manifest = read_manifest(books_dir)
+    if _manifest_complete(manifest):
+        return manifest
+    with publish_lock(books_dir):
+        return _locked_manifest(books_dir)
+
+def unique_filename(directory: str, original_name: str, taken=()) -> str:
+    # taken(매니페스트의 파일 목록)으로 겹치는 이름을 먼저 건너뛰고, 목록 밖에서 직접 넣은
+    # 파일을 덮어쓰지 않도록 마지막 후보만 디스크에서 확인한다.
+    base_name = os.path.basename(original_name)
+    name, ext = os.path.splitext(base_name)
+    candidate = base_name
+    idx = 1
+    while candidate in taken or os.path.exists(os.path.join(directory, candidate)):
+        candidate = f"{name}_{idx}{ext}"
+        idx += 1
+    return candidate
+
+def stage_upload(books_dir, stream):
+    # 업로드 스트림을 BOOKS_DIR 안 임시 파일에 청크 단위로 옮겨 적고 fsync 한다.
+    fd, tmp = tempfile.mkstemp(dir=books_dir, prefix=".upload-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(stream, f, UPLOAD_CHUNK)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return tmp
+
+def publish_staged(books_dir, tmp, original_name, progress=None):
+    # 임시 파일을 검증·색인한 뒤 게시한다. 잘못된 워크북이면 ValueError.
+    # (게시된 파일명, 현재 카탈로그 대비 변경 보고서 또는 None)을 돌려준다.
+    # 비교 기준은 파싱을 시작할 때의 현재 카탈로그다 (그 사이 다른 게시가 끼면 보고서의 base가 알려 준다).
+    try:
+        base, previous = current_catalog_blobs(books_dir)
+        blobs, frame, changes = build_blobs(tmp, progress, previous, base)
+        rows = len(frame)
+        entry = {"size": os.path.getsize(tmp), "uploaded_at": time.time(), "rows": rows, "sha256": file_sha256(tmp)}
+        if changes is not None:
+            entry["changes"] = {k: changes[k] for k in ("base", "inserted", "updated", "deleted")}
+        with publish_lock(books_dir):
+            files = dict(_locked_manifest(books_dir)["files"])
+            final_name = unique_filename(books_dir, original_name, files)
+            final_path = os.path.join(books_dir, final_name)
+            os.replace(tmp, final_path)
+            write_catalog_snapshot(final_path, blobs, rows)
+            _fsync_dir(books_dir)
+            files[final_name] = entry
+            _bump_manifest(books_dir, final_name, files)
+        return final_name, changes
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def publish_workbook(books_dir, stream, original_name):
+    final_name, _ = publish_staged(books_dir, stage_upload(books_dir, stream), original_name)
+    return final_name
+
+def delete_workbook(books_dir, filename):
+    if os.path.basename(filename) != filename:
+        return False
+    with publish_lock(books_dir):
+        path = os.path.join(books_dir, filename)
+        if not os.path.exists(path):
+            return False
+        manifest = _locked_manifest(books_dir)
+        files = dict(manifest["files"])
+        files.pop(filename, None)
+        current = manifest.get("current")
+        if current == filename:
+            current = newest_upload(files)
+        # 목록에서 먼저 빼고 지운다. 중간에 실패해도 목록에 없는 파일만 남는다.
+        _bump_manifest(books_dir, current, files)
+        os.remove(path)
+        if os.path.exists(snapshot_path(path)):
+            os.remove(snapshot_path(path))
+        return True
+
+# ===================== 업로드 목록 =====================
+# 관리자 목록 화면용. 매니페스트를 stat 한 번으로 확인하고 바뀌었을 때만 다시 읽어
+# 최신순으로 정렬해 둔다. 파일 크기·행 수·해시는 매니페스트에 있으므로 파일마다 stat 하지 않는다.
+class UploadList:
+    def __init__(self, books_dir):
+        self.books_dir = books_dir
+        self.manifest_path = manifest_path(books_dir)
+        self._state = (None, None)  # (매니페스트 stat 키, (현재 파일명, 최신순 항목 목록))
+
+    def get(self):
+        try:
+            st = os.stat(self.manifest_path)
+            key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            key = None
+        state = self._state
+        if key is not None and key == state[0]:
+            return state[1]
+        ensure_manifest(self.books_dir)
+        with open(self.manifest_path, encoding="utf-8") as f:
+            st = os.fstat(f.fileno())
+            manifest = json.load(f)
+        files = manifest.get("files", {})
+        entries = [dict(files[name], name=name) for name in files]
+        entries.sort(key=lambda e: (e["uploaded_at"], e["name"]), reverse=True)
+        result = (manifest.get("current"), entries)
+        self._state = ((st.st_ino, st.st_mtime_ns, st.st_size), result)
+        return result
+
+# ===================== 카탈로그 캐시 =====================
+# catalog.json이 가리키는 현재 워크북의 정제 데이터와 검색 인덱스를 프로세스 단위로 보관한다.
+# 내용은 스냅샷에서 오므로 엑셀 파싱은 스냅샷이 없을 때 한 번뿐이다.
+# 컬럼 값과 검색 구조는 모두 스냅샷 파일의 mmap 위에 있어서 DataFrame을 만들지 않고,
+# 워커 N개가 같은 페이지 캐시를 공유한다 (워커별 메모리는 LRU 같은 작은 상태뿐).
+# 검색 요청은 매니페스트 stat 한 번으로 버전만 비교한다. 버전이 바뀌면 새 카탈로그는
+# 백그라운드에서 올리고, 그동안 진행 중인 검색과 새 검색은 이전 카탈로그로 응답한다.
+class Catalog:
+    def __init__(self, blobs, path, version):
+        self.columns = {c: blobs[f"col:{c}"] for c in SEARCH_COLUMNS}
+        self.index = SearchIndex(**{name: blobs[name] for name in SearchIndex.BLOBS})
+        self.suggester = Autocomplete(**{name: blobs[name] for name in Autocomplete.BLOBS})
+        self.fuzzy = FuzzyIndex(**{name: blobs[name] for name in FuzzyIndex.BLOBS})
+        self.index.fuzzy = self.fuzzy
+        self.path = path
+        self.version = version
+        self.sha256 = None  # 게시된 워크북의 내용 해시 (매니페스트의 files 항목)
+        self.load_seconds = None
+        self.nbytes = sum(blob.nbytes if isinstance(blob, np.ndarray) else blob.nbytes() for blob in blobs.values())
+        self._blobs = blobs
+
+    def touch(self):
+        # mmap 된 스냅샷은 처음 건드리는 페이지를 그때 디스크에서 읽으므로, 워밍업에서 블롭마다
+        # 없는 바이트를 한 번 찾아 전체 페이지를 미리 올려 둔다 (첫 검색이 디스크를 기다리지 않게).
+        for blob in self._blobs.values():
+            if isinstance(blob, np.ndarray):
+                blob.sum()  # 오타 검색 배열
+            else:
+                blob.data.find(b"\x01", blob.begin, blob.end)
+
+    def __len__(self):
+        return len(self.columns[SEARCH_COLUMNS[0]])
+
+    def rows(self, ids):
+        columns = self.columns
+        return [{c: columns[c][i] for c in SEARCH_COLUMNS} for i in ids]
+
+    def row_values(self, ids):
+        columns = [self.columns[c] for c in SEARCH_COLUMNS]
+        return [[column[i] for column in columns] for i in ids]
+
+    def to_frame(self):
+        # 검색 경로에서는 쓰지 않는다. 전체 표가 필요한 도구용.
+        import pandas as pd
+        return pd.DataFrame({c: self.columns[c].values() for c in SEARCH_COLUMNS})
+
+class CatalogCache:
+    # loader: 카탈로그 적재(스냅샷이 없으면 엑셀 파싱까지)를 돌릴 실행기 (serving.BoundedExecutor).
+    # 없으면 부른 스레드에서 바로 읽는다. 있으면 적재는 그 슬롯에서만 돌고, 자리가 없으면 Busy가 올라온다.
+    def __init__(self, books_dir, loader=None):
+        self.books_dir = books_dir
+        self.loader = loader
+        self.manifest_path = manifest_path(books_dir)
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # (매니페스트 키, 카탈로그, 오류)를 한 튜플로 들고 있어야 교체가 원자적으로 보인다.
+        self._state = (None, None, None)
+        self._reloading = False
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.reloads = 0
+
+    def _manifest_key(self):
+        try:
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _load(self):
+        # 새 카탈로그를 다 만든 뒤 참조만 바꿔 끼우므로, 진행 중인 검색은 이전 것을 그대로 쓴다.
+        self._count("reloads")
+        previous = self._state[1]
+        # 해시가 빠진 예전 매니페스트면 여기서 채운다 (catalog.sha256 이 항상 있도록).
+        ensure_manifest(self.books_dir)
+        try:
+            # 키는 실제로 읽은 매니페스트 파일에서 얻어야 읽는 도중 바뀐 경우를 놓치지 않는다.
+            with open(self.manifest_path, encoding="utf-8") as f:
+                st = os.fstat(f.fileno())
+                manifest = json.load(f)
+        except FileNotFoundError:
+            self._state = (None, previous, None)
+            return
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if not manifest.get("current"):
+            self._state = (key, None, None)
+            return
+        path = os.path.join(self.books_dir, manifest["current"])
+        started = time.perf_counter()
+        try:
+            xst = os.stat(path)
+            blobs = load_catalog_blobs(path, xst.st_mtime_ns, xst.st_size)
+        except (ValueError, OSError) as e:
+            # 같은 버전을 검색마다 다시 시도하지 않도록 오류도 키와 함께 기억한다.
+            # 이전 카탈로그가 있으면 그것으로 계속 응답한다.
+            self._state = (key, previous, e)
+            return
+        version = str(manifest["version"])
+        catalog = Catalog(blobs, path, version)
+        catalog.sha256 = manifest.get("files", {}).get(manifest["current"], {}).get("sha256")
+        catalog.load_seconds = time.perf_counter() - started
+        self._state = (key, catalog, None)
+
+    @staticmethod
+    def _result(state):
+        _, catalog, error = state
+        if catalog is not None:
+            return catalog
+        if error is not None:
+            raise error
+        raise FileNotFoundError("업로드된 도서 데이터가 없습니다!")
+
+    def _reload_in_background(self):
+        with self._stats_lock:
+            if self._reloading:
+                return
+            self._reloading = True
+
+        def run():
+            try:
+                with self._lock:
+                    if self._manifest_key() != self._state[0]:
+                        self._load()
+            finally:
+                self._reloading = False
+
+        if self.loader is None:
+            threading.Thread(target=run, name="catalog-reload", daemon=True).start()
+            return
+        try:
+            # 슬롯을 기다리지 않는다 (다른 지점의 첫 적재가 돌고 있어도 검색은 이전 카탈로그로 바로 응답한다).
+            self.loader.try_submit(run)
+        except Busy:
+            # 적재 슬롯이 꽉 찼다: 이번에는 이전 카탈로그로 응답하고 다음 요청에서 다시 시도한다.
+            self._reloading = False
+
+    def get(self):
+        key = self._manifest_key()
+        if key is None:
+            ensure_manifest(self.books_dir)
+            key = self._manifest_key()
+        state = self._state
+        if key == state[0]:
+            self._count("hits")
+            return self._result(state)
+        if state[1] is not None:
+            self._count("stale")
+            self._reload_in_background()
+            return state[1]
+        # 처음 올리는 경우에는 기다릴 카탈로그가 없으니 적재가 끝날 때까지 기다린다.
+        if self.loader is None:
+            return self._result(self._load_missing(key))
+        return self._result(self.loader.run(self._load_missing, key))
+
+    def _load_missing(self, key):
+        with self._lock:
+            if key == self._state[0]:
+                self._count("hits")
+            else:
+                self._count("misses")
+                self._load()
+            return self._state
+
+    def readiness(self):
+        # /readyz 용. 들고 있는 상태와 매니페스트 stat 한 번만 본다 (적재를 걸거나 잠금을 기다리지 않는다).
+        #   ready: 최신 카탈로그  stale: 이전 카탈로그로 응답 중 (새 버전은 다음 검색이 백그라운드로 읽는다)
+        #   empty: 게시된 카탈로그 없음  loading: 카탈로그 없이 적재 중
+        #   error: 읽지 못했고 대신 쓸 카탈로그도 없음  cold: 이 프로세스에서 아직 읽지 않음 (첫 검색이 읽는다)
+        key = self._manifest_key()
+        state_key, catalog, error = self._state
+        if catalog is not None:
+            return "ready" if key == state_key else "stale"
+        if self._lock.locked() or self._reloading:
+            return "loading"
+        if key == state_key:
+            return "error" if error is not None else "empty"
+        return "cold"
+
+    def start_loading(self):
+        # 기다리지 않고 백그라운드 적재만 걸어 둔다 (이미 최신이거나 적재 중이면 아무것도 안 한다).
+        # 워밍업을 끈 워커가 /readyz 에서 cold 로 머물지 않게 할 때 쓴다.
+        self._reload_in_background()
+
+    def reload(self):
+        # 관리자 업로드/삭제 직후 호출: 이 워커는 다음 검색부터 바로 새 버전을 쓴다.
+        with self._lock:
+            self._load()
+
+    def version(self):
+        # stat 없이 지금 들고 있는 카탈로그 버전만 본다.
+        catalog = self._state[1]
+        return catalog.version if catalog else None
+
+    def stats(self):
+        _, catalog, error = self._state
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "reloads": self.reloads,
+            "reloading": self._reloading,
+            "version": catalog.version if catalog else None,
+            "rows": len(catalog) if catalog else 0,
+            "mapped_bytes": catalog.nbytes if catalog else 0,
+            "fuzzy_bytes": catalog.fuzzy.nbytes() if catalog else 0,
+            "load_seconds": round(catalog.load_seconds, 4) if catalog else None,
+            "suggest_hits": catalog.suggester.hits if catalog else 0,
+            "suggest_misses": catalog.suggester.misses if catalog else 0,
+            "error": str(error) if error else None,
+        }
@@ -0,0 +1,70 @@
+from collections import defaultdict, deque
+from query import normalize_isbn
+from search_engine import SEARCH_COLUMNS
+
+# ===================== 카탈로그 비교 =====================
+# 새 워크북을 현재 카탈로그와 행 단위로 맞춰 보고 추가/변경/삭제를 센다.
+# 행은 ISBN(정규화)으로 맞추고, ISBN이 없으면 제목+저자로 맞춘다. 같은 키가 여러 행이면
+# 나온 순서대로 짝을 짓는다. 관리자 화면에는 건수와 앞쪽 몇 건의 예시만 보여 준다.
+SAMPLE_LIMIT = 30
+_TITLE, _AUTHOR, _ISBN = SEARCH_COLUMNS.index("제목"), SEARCH_COLUMNS.index("저자"), SEARCH_COLUMNS.index("ISBN")
+
+def row_key(row):
+    isbn = row[_ISBN].strip()
+    if isbn:
+        return ("isbn", normalize_isbn(isbn) or isbn)
+    return ("title", row[_TITLE].strip(), row[_AUTHOR].strip())
+
+def _rows(columns):
+    return list(zip(*(columns[c] for c in SEARCH_COLUMNS)))
+
+def diff_catalogs(old_columns, new_columns, base=None):
+    # old_columns/new_columns: {컬럼: 값 목록}
+    # (보고서, same)을 돌려준다. same[i]는 새 i번째 행과 똑같은 이전 행 번호, 없으면 None.
+    old_rows = _rows(old_columns)
+    new_rows = _rows(new_columns)
+    report = {"base": base, "inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0,
+              "samples": {"inserted": [], "updated": [], "deleted": []}}
+    samples = report["samples"]
+
+    # 대부분의 행은 그대로이므로 먼저 행 전체가 같은 것끼리 짝짓고, 남은 행만 키를 계산해 맞춘다.
+    exact = defaultdict(deque)
+    for j, row in enumerate(old_rows):
+        exact[row].append(j)
+    same = [None] * len(new_rows)
+    taken = [False] * len(old_rows)
+    for i, row in enumerate(new_rows):
+        candidates = exact.get(row)
+        if candidates:
+            j = candidates.popleft()
+            same[i] = j
+            taken[j] = True
+    report["unchanged"] = len(new_rows) - same.count(None)
+
+    old_by_key = defaultdict(list)
+    for j, row in enumerate(old_rows):
+        if not taken[j]:
+            old_by_key[row_key(row)].append(j)
+    used = defaultdict(int)
+    for i, row in enumerate(new_rows):
+        if same[i] is not None:
+            continue
+        key = row_key(row)
+        candidates = old_by_key.get(key)
+        if not candidates or used[key] >= len(candidates):
+            report["inserted"] += 1
+            if len(samples["inserted"]) < SAMPLE_LIMIT:
+                samples["inserted"].append(dict(zip(SEARCH_COLUMNS, row)))
+            continue
+        old = old_rows[candidates[used[key]]]
+        used[key] += 1
+        report["updated"] += 1
+        if len(samples["updated"]) < SAMPLE_LIMIT:
+            changes = {c: [a, b] for c, a, b in zip(SEARCH_COLUMNS, old, row) if a != b}
+            samples["updated"].append({"제목": row[_TITLE], "저자": row[_AUTHOR], "changes": changes})
+    for key, candidates in old_by_key.items():
+        for j in candidates[used.get(key, 0):]:
+            report["deleted"] += 1
+            if len(samples["deleted"]) < SAMPLE_LIMIT:
+                samples["deleted"].append(dict(zip(SEARCH_COLUMNS, old_rows[j])))
+    return report, same
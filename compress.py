@@ -0,0 +1,80 @@
+import gzip
+import threading
+from collections import OrderedDict
+from flask import request
+import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli가 없으면 gzip만 협상한다.
+    brotli = None
+
+# ===================== 응답 압축 =====================
+# HTML/JSON/CSS/JS 응답을 Accept-Encoding 에 맞춰 br(가능하면) 또는 gzip으로 압축한다.
+# 작은 응답은 헤더보다 이득이 적어서 그대로 보낸다.
+# ETag가 붙은 응답(정적 자원, 첫 화면)은 내용이 ETag로 정해지므로 최고 압축률로 한 번만
+# 압축해 두고 재사용한다. 검색 결과처럼 매번 다른 응답은 빠른 압축 수준을 쓴다.
+# 압축된 응답의 ETag는 약한 ETag(W/)로 바꾼다. If-None-Match 는 약한 비교라 304는 그대로 된다.
+COMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE = {"text/html", "text/css", "text/plain", "text/csv", "application/json",
+                "application/javascript", "text/javascript", "application/x-ndjson"}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+STATIC_CACHE_SIZE = 64
+
+_static_cache = OrderedDict()  # (ETag, 인코딩, 원본 크기) -> 압축된 바이트
+_static_lock = threading.Lock()
+
+def choose_encoding():
+    accept = request.accept_encodings
+    if brotli is not None and accept.quality("br") > 0:
+        return "br"
+    if accept.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+def compress(data, encoding, static=False):
+    if encoding == "br":
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+
+def _cached_compress(etag, data, encoding):
+    key = (etag, encoding, len(data))
+    with _static_lock:
+        body = _static_cache.get(key)
+        if body is not None:
+            _static_cache.move_to_end(key)
+            return body
+    body = compress(data, encoding, static=True)
+    with _static_lock:
+        _static_cache[key] = body
+        if len(_static_cache) > STATIC_CACHE_SIZE:
+            _static_cache.popitem(last=False)
+    return body
+
+def init_app(app):
+    @app.after_request
+    def _compress_response(resp):
+        if (resp.status_code != 200 or resp.direct_passthrough or resp.is_streamed
+                or "Content-Encoding" in resp.headers or resp.mimetype not in COMPRESSIBLE):
+            return resp
+        resp.vary.add("Accept-Encoding")
+        encoding = choose_encoding()
+        if encoding is None:
+            return resp
+        data = resp.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return resp
+        etag, weak = resp.get_etag()
+        with metrics.stage("compress"):
+            if etag and not weak:
+                body = _cached_compress(etag, data, encoding)
+            else:
+                body = compress(data, encoding)
+        resp.set_data(body)
+        resp.headers["Content-Encoding"] = encoding
+        if etag:
+            resp.set_etag(etag, weak=True)
+        return resp
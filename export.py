@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+from search_engine import SEARCH_COLUMNS
+
+# ===================== 카탈로그 내보내기 =====================
+# POS·재고 스크립트가 엑셀을 직접 읽지 않도록, 정제된 현재 카탈로그(검색 화면에 보이는 값)를
+# CSV 또는 NDJSON(한 줄에 JSON 객체 하나)으로 흘려보낸다. 스냅샷의 컬럼 블롭에서 EXPORT_CHUNK_ROWS 행씩
+# 꺼내 인코딩해 내보내므로, 카탈로그 크기와 상관없이 메모리는 한 묶음만큼만 쓴다.
+# 응답을 보내는 동안 새 버전이 게시되어도 시작할 때 잡은 카탈로그(같은 mmap)를 끝까지 읽는다.
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_CHUNK_ROWS = 1000
+
+def export_columns(spec):
+    # "제목,저자" -> ["제목", "저자"]. 비어 있으면 전체 컬럼, 모르는 컬럼이면 ValueError.
+    if not spec or not spec.strip():
+        return list(SEARCH_COLUMNS)
+    columns = [c.strip() for c in spec.split(",") if c.strip()]
+    unknown = [c for c in columns if c not in SEARCH_COLUMNS]
+    if unknown:
+        raise ValueError(f"없는 컬럼입니다: {', '.join(unknown)} (가능: {', '.join(SEARCH_COLUMNS)})")
+    return list(dict.fromkeys(columns))
+
+def _chunks(catalog, columns):
+    # 행 값 목록을 EXPORT_CHUNK_ROWS 개씩
+    blobs = [catalog.columns[c] for c in columns]
+    total = len(catalog)
+    for start in range(0, total, EXPORT_CHUNK_ROWS):
+        rows = range(start, min(start + EXPORT_CHUNK_ROWS, total))
+        yield [[blob[i] for blob in blobs] for i in rows]
+
+def iter_csv(catalog, columns):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(columns)
+    for chunk in _chunks(catalog, columns):
+        writer.writerows(chunk)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+def iter_ndjson(catalog, columns):
+    for chunk in _chunks(catalog, columns):
+        yield "".join(json.dumps(dict(zip(columns, values)), ensure_ascii=False) + "\n"
+                      for values in chunk).encode("utf-8")
+
+def iter_export(catalog, fmt, columns):
+    return iter_csv(catalog, columns) if fmt == "csv" else iter_ndjson(catalog, columns)
@@ -0,0 +1,173 @@
+import numpy as np
+from hangul import decompose, is_choseong_query, SYLLABLE_MARK
+from query import parse_query
+from search_engine import normalize_keyword, TextBlob, MATCH_FUZZY
+
+# ===================== 오타 검색 =====================
+# 검색 결과가 하나도 없을 때만 쓰는 유사 검색. "나르토" → 나루토, "진격의 거잉" → 진격의 거인.
+# 제목/저자를 자모로 분해하고 공백을 뺀 문자열(고유 값)마다 자모 3글자(트라이그램) 목록을
+# 게시할 때 numpy 배열로 만들어 스냅샷에 넣는다 (트라이그램 키 정렬 배열 + 키별 문자열 번호 목록).
+# 워커는 다른 블롭처럼 mmap 위의 배열을 그대로 쓰므로 인덱스를 다시 만들지도, 따로 들고 있지도 않는다.
+# 검색할 때는
+#   1) 검색어 트라이그램의 문자열 번호 목록을 이어 붙여 bincount 로 겹치는 개수를 세고,
+#   2) 편집 거리 k 안이면 최소한 겹쳐야 하는 개수(트라이그램 수 - 3k) 미만은 버린 뒤
+#      겹치는 비율이 높은 순으로 앞의 SHORTLIST개만 남기고,
+#   3) 그 후보만 비트 병렬(Myers) 편집 거리로 검사한다.
+# 거리는 자모 단위라 받침·모음 하나 틀린 글자는 1, 띄어쓰기 차이는 0이다.
+# 검색어가 제목/저자의 일부여도 되도록 문자열 안 아무 위치에서나 맞춰 본 최소 거리를 쓴다.
+SHORTLIST = 64
+MIN_JAMO = 4     # 이보다 짧은 검색어는 오타 검색을 하지 않는다 (거의 모든 행이 비슷해진다)
+MAX_EDITS = 3
+
+def fuzzy_key(text):
+    # 자모로 풀고 공백을 뺀 비교용 문자열 (블롭 값은 이미 소문자)
+    return "".join(decompose(text).split())
+
+def _gram_codes(codes):
+    # 코드 포인트 3개를 한 uint64 키로 (코드 포인트는 21비트 이하)
+    return (codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:]
+
+def _query_grams(key):
+    codes = np.frombuffer(key.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    return np.unique(_gram_codes(codes))
+
+def edit_distance_within(pattern, text):
+    # pattern이 text 안 어딘가와 맞춰지는 최소 편집 거리 (Myers 1999, 파이썬 정수를 비트 벡터로 쓴다)
+    m = len(pattern)
+    peq = {}
+    for i, ch in enumerate(pattern):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    full = (1 << m) - 1
+    top = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    best = m
+    for ch in text:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & top:
+            score += 1
+        elif mh & top:
+            score -= 1
+            if score < best:
+                best = score
+        # 왼쪽 끝에 1을 넣지 않으므로 text의 어느 위치에서 시작해도 비용이 0이다.
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+    return best
+
+class FuzzyIndex:
+    BLOBS = ("fuzzy_keys", "fuzzy_gram_keys", "fuzzy_gram_starts", "fuzzy_postings", "fuzzy_gram_counts",
+             "fuzzy_entry_starts", "fuzzy_entry_rows")
+
+    def __init__(self, fuzzy_keys, fuzzy_gram_keys, fuzzy_gram_starts, fuzzy_postings, fuzzy_gram_counts,
+                 fuzzy_entry_starts, fuzzy_entry_rows):
+        self.keys = fuzzy_keys                  # 고유 비교용 문자열 (TextBlob)
+        self.gram_keys = fuzzy_gram_keys        # 정렬된 트라이그램 키
+        self.gram_starts = fuzzy_gram_starts    # 키별 postings 시작 위치 (끝에 len(postings))
+        self.postings = fuzzy_postings          # 키마다 그 트라이그램이 든 문자열 번호
+        self.gram_counts = fuzzy_gram_counts    # 문자열별 트라이그램 수
+        self.entry_starts = fuzzy_entry_starts  # 문자열별 entry_rows 시작 위치
+        self.entry_rows = fuzzy_entry_rows      # 문자열마다 그 값을 가진 (필드 * rows + 행 번호), 오름차순
+        self.rows = len(fuzzy_entry_rows) // 2  # 행마다 제목·저자 두 항목
+
+    @classmethod
+    def from_values(cls, titles, authors):
+        # titles/authors: 행 순서의 소문자 자모 분해 값 (SearchIndex의 title_jamo/author_jamo 블롭)
+        rows = len(titles)
+        ids, keys = {}, []
+        row_entry = np.empty(2 * rows, dtype=np.int32)
+        for i, value in enumerate(titles + authors):
+            key = "".join(value.replace(SYLLABLE_MARK, "").split())
+            entry = ids.get(key)
+            if entry is None:
+                entry = ids[key] = len(keys)
+                keys.append(key)
+            row_entry[i] = entry
+        order = np.argsort(row_entry, kind="stable").astype(np.int32)
+        entry_starts = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_entry, minlength=len(keys)), out=entry_starts[1:])
+
+        # 고유 문자열을 \x00 으로 이어 붙이고, \x00이 낀 창을 빼면 문자열 경계를 넘는 트라이그램이 없다.
+        codes = np.frombuffer("\x00".join(keys).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        lengths = np.fromiter((len(k) + 1 for k in keys), dtype=np.int64, count=len(keys))
+        owner = np.repeat(np.arange(len(keys), dtype=np.int32), lengths)[:len(codes)]
+        if len(codes) >= 3:
+            valid = (codes[:-2] != 0) & (codes[1:-1] != 0) & (codes[2:] != 0)
+            grams, owners = _gram_codes(codes)[valid], owner[:-2][valid]
+        else:
+            grams, owners = np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int32)
+        order_g = np.lexsort((owners, grams))
+        grams, owners = grams[order_g], owners[order_g]
+        # 한 문자열 안에서 같은 트라이그램이 여러 번 나오면 한 번만 센다.
+        keep = np.ones(len(grams), dtype=bool)
+        keep[1:] = (grams[1:] != grams[:-1]) | (owners[1:] != owners[:-1])
+        grams, owners = grams[keep], owners[keep]
+        gram_keys, first = np.unique(grams, return_index=True)
+        gram_starts = np.append(first, len(owners)).astype(np.int64)
+        gram_counts = np.bincount(owners, minlength=len(keys)).astype(np.int32)
+        return cls(TextBlob.from_strings(keys), gram_keys, gram_starts, owners, gram_counts, entry_starts, order)
+
+    def blobs(self):
+        return dict(zip(self.BLOBS, (self.keys, self.gram_keys, self.gram_starts, self.postings, self.gram_counts,
+                                     self.entry_starts, self.entry_rows)))
+
+    def nbytes(self):
+        arrays = (self.gram_keys, self.gram_starts, self.postings, self.gram_counts,
+                  self.entry_starts, self.entry_rows)
+        return sum(a.nbytes for a in arrays) + self.keys.nbytes()
+
+    def _candidates(self, key, max_edits):
+        # 트라이그램이 충분히 겹치는 문자열 번호를 겹치는 비율 순으로 (많아야 SHORTLIST개)
+        grams = _query_grams(key)
+        if not len(grams) or not len(self.gram_keys):
+            return []
+        pos = np.searchsorted(self.gram_keys, grams)
+        present = pos < len(self.gram_keys)
+        present[present] = self.gram_keys[pos[present]] == grams[present]
+        pos = pos[present]
+        if not len(pos):
+            return []
+        hits = np.concatenate([self.postings[self.gram_starts[p]:self.gram_starts[p + 1]] for p in pos])
+        counts = np.bincount(hits, minlength=len(self.keys))
+        need = max(1, len(grams) - 3 * max_edits)
+        found = np.flatnonzero(counts >= need)
+        shared = counts[found]
+        # 겹치는 비율 (자카드): 긴 제목이 짧은 트라이그램 하나로 후보를 다 차지하지 않게 한다.
+        score = shared / (len(grams) + self.gram_counts[found] - shared)
+        if len(found) > SHORTLIST:
+            top = np.argpartition(-score, SHORTLIST)[:SHORTLIST]
+            found, score = found[top], score[top]
+        order = np.argsort(-score, kind="stable")
+        return found[order].tolist()
+
+    def iter_rows(self, query):
+        # (행 번호, MATCH_FUZZY)를 편집 거리가 작은 순으로. 같은 거리면 트라이그램이 많이 겹친 값이 먼저다.
+        # 제목:/저자: 로만 지정한 검색어는 그 필드에서만 찾고, 다른 필드 지정이 있으면 찾지 않는다.
+        clauses = parse_query(query)
+        fields = {c.field for c in clauses}
+        if not clauses or not fields <= {None, "제목", "저자"}:
+            return
+        text = normalize_keyword(" ".join(c.text for c in clauses))
+        key = fuzzy_key(text)
+        if len(key) < MIN_JAMO or is_choseong_query(text):
+            return
+        max_edits = min(MAX_EDITS, max(1, len(key) // 4))
+        scored = []
+        for rank, entry in enumerate(self._candidates(key, max_edits)):
+            distance = edit_distance_within(key, self.keys[entry])
+            if distance <= max_edits:
+                scored.append((distance, rank, entry))
+        scored.sort()
+        only = {"제목": 0, "저자": 1}.get(next(iter(fields))) if len(fields) == 1 else None
+        seen = set()
+        for _, _, entry in scored:
+            for value in self.entry_rows[self.entry_starts[entry]:self.entry_starts[entry + 1]].tolist():
+                field, row = divmod(value, self.rows)
+                if (only is None or field == only) and row not in seen:
+                    seen.add(row)
+                    yield row, MATCH_FUZZY
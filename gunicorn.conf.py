@@ -0,0 +1,40 @@
+import os
+import serving
+
+# ===================== gunicorn 설정 =====================
+#   gunicorn -c gunicorn.conf.py app:app
+# 워커·스레드 수는 serving.py 가 CPU 수와 환경변수(WEB_WORKERS, WEB_THREADS ...)로 정한다.
+# gthread 워커는 keep-alive 연결을 이벤트 루프로 들고 있다가 요청이 오면 스레드에 넘기므로,
+# 놀고 있는 연결이 스레드를 차지하지 않는다.
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = serving.worker_count()
+worker_class = "gthread"
+threads = serving.thread_count()
+worker_connections = serving.CONNECTION_LIMIT
+backlog = serving.BACKLOG
+keepalive = serving.KEEPALIVE
+timeout = 120  # 업로드 파일 받기까지는 요청 스레드에서 하므로 넉넉히
+graceful_timeout = 30
+
+# PRELOAD=0 이면 워커마다 따로 앱을 읽는다 (코드 수정 후 워커만 재시작하고 싶을 때).
+preload_app = os.environ.get("PRELOAD", "1") != "0"
+
+def _warm_up(log):
+    import app
+    loaded = app.warm_up()
+    if not loaded:
+        log.info("warm-up: 아직 카탈로그가 없습니다")
+    for branch_id, catalog in loaded.items():
+        log.info("warm-up: %s 카탈로그 %s (%d행) %.3fs", branch_id, catalog.version, len(catalog), catalog.load_seconds)
+    log.info("warm-up: %.3fs", app.warm_up_state["seconds"])
+
+def when_ready(server):
+    # --preload: 워커를 fork 하기 전에 카탈로그 스냅샷을 열고 조회표를 만들어 둔다.
+    # mmap 된 스냅샷 페이지는 fork 후에도 워커들이 같은 페이지 캐시를 나눠 쓴다.
+    if server.cfg.preload_app and serving.warm_up_enabled(preload=True):
+        _warm_up(server.log)
+
+def post_worker_init(worker):
+    # --preload 를 끈 경우(PRELOAD=0)에는 WARM_UP=1 일 때 워커마다 요청을 받기 전에 미리 읽는다.
+    if not worker.cfg.preload_app and serving.warm_up_enabled(preload=False):
+        _warm_up(worker.log)
@@ -0,0 +1,55 @@
+# ===================== 한글 자모 =====================
+# 초성 검색("ㄱㅈㄱ")과 입력 중인 음절("원ㅍ") 매칭을 위해 음절을 호환 자모로 분해한다.
+# 겹받침·겹모음까지 낱자로 풀어 두면 IME의 입력 중간 상태가 항상 접두 문자열이 된다.
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+             "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+SYLLABLE_BASE = 0xAC00
+SYLLABLE_COUNT = 11172
+CHOSEONG_SET = frozenset(CHOSEONG)
+# 검색용 분해에서 음절(과 낱자 자음) 앞에 붙이는 표시. 엑셀 셀에 들어올 수 없는 제어문자다.
+SYLLABLE_MARK = "\x1e"
+COMPAT_CONSONANTS = range(0x3131, 0x314F)  # ㄱ..ㅎ (겹받침 포함)
+
+def _split(jamo):
+    return COMPOUND_JAMO.get(jamo, jamo)
+
+def _build_tables():
+    jamo_table = {ord(k): v for k, v in COMPOUND_JAMO.items()}
+    cho_table = {}
+    for code in range(SYLLABLE_COUNT):
+        cho, rest = divmod(code, 21 * 28)
+        jung, jong = divmod(rest, 28)
+        syllable = SYLLABLE_BASE + code
+        jamo_table[syllable] = CHOSEONG[cho] + _split(JUNGSEONG[jung]) + "".join(_split(j) for j in JONGSEONG[jong])
+        cho_table[syllable] = CHOSEONG[cho]
+    marked_table = dict(jamo_table)
+    for code in list(range(SYLLABLE_BASE, SYLLABLE_BASE + SYLLABLE_COUNT)) + list(COMPAT_CONSONANTS):
+        marked_table[code] = SYLLABLE_MARK + jamo_table.get(code, chr(code))
+    return jamo_table, cho_table, marked_table
+
+# str.translate 한 번으로 분해가 끝나도록 음절 전체 표를 미리 만들어 둔다.
+_JAMO_TABLE, _CHOSEONG_TABLE, _MARKED_TABLE = _build_tables()
+
+def decompose(text):
+    return text.translate(_JAMO_TABLE)
+
+def decompose_marked(text):
+    # 음절마다 앞에 SYLLABLE_MARK를 붙여 분해한다 ("상어" -> "·ㅅㅏㅇ·ㅇㅓ").
+    # 검색어도 같이 분해하면 앞 음절들은 온전한 음절로만 맞고, 자모 접두로 맞는 건 입력 중인
+    # 마지막 음절뿐이다 ("상"이 "사의"의 ㅅㅏ+ㅇ 에 걸리지 않고, "원ㅍ"는 "원피스"에 맞는다).
+    return text.translate(_MARKED_TABLE)
+
+def choseong(text):
+    # 초성 검색은 띄어쓰기 없이 입력하는 경우가 대부분이라 공백을 뺀다.
+    return "".join(text.translate(_CHOSEONG_TABLE).split())
+
+def is_choseong_query(text):
+    letters = "".join(text.split())
+    return bool(letters) and all(ch in CHOSEONG_SET for ch in letters)
@@ -0,0 +1,159 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow가 없으면 원본만 그대로 내보낸다.
+    Image = None
+
+# ===================== 첨부 이미지 =====================
+# 업로드 시점에 폭별 축소본(WebP/JPEG)을 한 번 만들어 두고, 현재 이미지 정보는
+# <basename>.json 매니페스트로 남긴다. 요청 경로에서는 매니페스트 stat 한 번으로
+# 메모리의 정보가 최신인지만 확인한다 (다른 워커가 올린 이미지도 여기서 감지된다).
+IMAGE_WIDTHS = (480, 960, 1600)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+VARIANT_DIR = "img_variants"
+ORIGINAL_EXTS = (".jpg", ".jpeg", ".png")
+_UNSET = object()
+MIMETYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
+
+class ImageInfo:
+    def __init__(self, directory, meta):
+        self.directory = directory
+        self.hash = meta["hash"]
+        self.original = meta["original"]
+        self.variants = {v["file"]: v for v in meta["variants"]}
+        self._meta = meta
+
+    def path(self, name):
+        if name == "original":
+            return os.path.join(self.directory, self.original)
+        return os.path.join(self.directory, VARIANT_DIR, name)
+
+    def mimetype(self, name):
+        filename = self.original if name == "original" else name
+        return MIMETYPES[os.path.splitext(filename)[1].lower()]
+
+    def url(self, name):
+        return f"/img/{self.hash}/{name}"
+
+    def srcset(self, fmt):
+        items = sorted((v["width"], v["file"]) for v in self._meta["variants"] if v["format"] == fmt)
+        return ", ".join(f"{self.url(name)} {width}w" for width, name in items)
+
+    @property
+    def src(self):
+        # srcset을 모르는 브라우저용 기본값: 중간 크기 JPEG, 없으면 원본
+        jpegs = sorted((v["width"], v["file"]) for v in self._meta["variants"] if v["format"] == "jpeg")
+        if not jpegs:
+            return self.url("original")
+        return self.url(jpegs[len(jpegs) // 2][1])
+
+class ImageStore:
+    def __init__(self, directory, basename):
+        self.directory = directory
+        self.basename = basename
+        self.manifest_path = os.path.join(directory, basename + ".json")
+        self._lock = threading.Lock()
+        self._state = (_UNSET, None)  # (매니페스트 stat 키, ImageInfo)
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def current(self):
+        key = self._stat_key()
+        state = self._state
+        if key == state[0]:
+            return state[1]
+        with self._lock:
+            if key is None:
+                # 매니페스트 도입 전에 올라온 이미지는 처음 볼 때 한 번 변환해 둔다.
+                legacy = self._legacy_original()
+                if legacy is None:
+                    self._state = (None, None)
+                    return None
+                with open(legacy, "rb") as f:
+                    self._publish(f.read(), os.path.splitext(legacy)[1].lower())
+                key = self._stat_key()
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self._state = (key, ImageInfo(self.directory, json.load(f)))
+            return self._state[1]
+
+    def _legacy_original(self):
+        for ext in ORIGINAL_EXTS:
+            p = os.path.join(self.directory, self.basename + ext)
+            if os.path.exists(p):
+                return p
+        return None
+
+    def save(self, data, ext):
+        with self._lock:
+            self._publish(data, ext)
+            self._state = (_UNSET, None)
+        return self.current()
+
+    def _publish(self, data, ext):
+        # 새 파일을 모두 쓰고 매니페스트를 바꾼 뒤에 옛 파일을 지운다.
+        # 그 사이 옛 매니페스트를 보고 있던 요청도 파일을 잃지 않는다.
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        variant_dir = os.path.join(self.directory, VARIANT_DIR)
+        os.makedirs(variant_dir, exist_ok=True)
+        original = self.basename + ext
+        _write_atomic(os.path.join(self.directory, original), data)
+        meta = {"hash": digest, "original": original, "variants": make_variants(data, digest, variant_dir)}
+        _write_atomic(self.manifest_path, json.dumps(meta).encode("utf-8"))
+
+        for e in ORIGINAL_EXTS:
+            if e != ext:
+                try: os.remove(os.path.join(self.directory, self.basename + e))
+                except OSError: pass
+        for name in os.listdir(variant_dir):
+            if not name.startswith(digest + "-"):
+                try: os.remove(os.path.join(variant_dir, name))
+                except OSError: pass
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".img-", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def make_variants(data, digest, variant_dir):
+    if Image is None:
+        return []
+    try:
+        img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        img.load()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return []
+    webp = features.check("webp")
+    rgb = img.convert("RGB") if img.mode not in ("RGBA", "LA", "P") else _flatten(img)
+    widths = sorted({w for w in IMAGE_WIDTHS if w < img.width} | {min(img.width, IMAGE_WIDTHS[-1])})
+    variants = []
+    for width in widths:
+        height = max(1, round(img.height * width / img.width))
+        resized = rgb.resize((width, height), Image.LANCZOS)
+        name = f"{digest}-{width}.jpg"
+        resized.save(os.path.join(variant_dir, name), "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        variants.append({"width": width, "format": "jpeg", "file": name})
+        if webp:
+            name = f"{digest}-{width}.webp"
+            resized.save(os.path.join(variant_dir, name), "WEBP", quality=WEBP_QUALITY, method=4)
+            variants.append({"width": width, "format": "webp", "file": name})
+    return variants
+
+def _flatten(img):
+    # 투명 PNG는 JPEG로 옮길 때 검은 배경이 되지 않도록 흰 배경에 얹는다.
+    img = img.convert("RGBA")
+    background = Image.new("RGB", img.size, (255, 255, 255))
+    background.paste(img, mask=img.getchannel("A"))
+    return background
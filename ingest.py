@@ -0,0 +1,153 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from catalog import publish_staged
+import metrics
+
+# ===================== 백그라운드 적재 =====================
+# 관리자 업로드는 임시 파일로 받아 두고 바로 응답한다. 파싱·색인·게시는 적재 스레드가 맡고,
+# 그동안 검색은 이전 카탈로그 버전을 그대로 쓴다. 진행 상황은 BOOKS_DIR/.ingest/<job>.json 에
+# 남겨서, 상태 조회가 업로드를 받은 워커가 아닌 다른 gunicorn 워커로 가도 같은 답을 준다.
+STATUS_DIR = ".ingest"
+KEEP_JOBS = 20
+RUNNING_STATES = ("queued", "parsing", "indexing")
+# 진행 중 상태가 이 시간(초) 넘게 갱신되지 않으면 적재하던 프로세스가 죽은 것으로 보고 실패로 적는다.
+# 업로드 임시 파일도 이보다 오래되면 지운다. 예: STALE_JOB_SECONDS=3600
+STALE_JOB_SECONDS = float(os.environ.get("STALE_JOB_SECONDS", "3600") or 3600)
+
+class IngestJobs:
+    def __init__(self, books_dir, on_published=None):
+        self.books_dir = books_dir
+        self.status_dir = os.path.join(books_dir, STATUS_DIR)
+        self.on_published = on_published
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+        self._lock = threading.Lock()
+        self.sweep()
+
+    def sweep(self):
+        # 시작할 때 한 번: 재시작·강제 종료로 남은 업로드 임시 파일을 지우고, 멈춘 작업을 실패로 적는다.
+        # 다른 워커가 지금 처리 중인 업로드를 건드리지 않도록 STALE_JOB_SECONDS 보다 오래된 것만 본다.
+        cutoff = time.time() - STALE_JOB_SECONDS
+        for directory, prefix in ((self.books_dir, ".upload-"), (self.status_dir, ".job-")):
+            try:
+                names = os.listdir(directory)
+            except FileNotFoundError:
+                continue
+            for name in names:
+                if not (name.startswith(prefix) and name.endswith(".tmp")):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+        for name in self._job_files():
+            self.status(name[:-5])
+
+    def submit(self, tmp_path, original_name):
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "filename": os.path.basename(original_name),
+            "state": "queued",
+            "rows": 0,
+            "total_rows": None,
+            "published_as": None,
+            "changes": None,
+            "error": None,
+            "submitted_at": time.time(),
+            "finished_at": None,
+        }
+        self._save(job)
+        self._executor.submit(self._run, job, tmp_path)
+        return job["id"]
+
+    def _run(self, job, tmp_path):
+        job["state"] = "parsing"
+        job["timings"] = {}
+        self._save(job)
+        started = mark = time.perf_counter()
+
+        def lap(name):
+            # 단계별 소요 시간은 상태 파일과 /metrics 히스토그램 양쪽에 남긴다.
+            nonlocal mark
+            now = time.perf_counter()
+            job["timings"][name] = round(now - mark, 4)
+            metrics.observe_ingest(name, now - mark)
+            mark = now
+
+        def progress(rows, total):
+            job["rows"], job["total_rows"] = rows, total
+            if rows == total and job["state"] != "indexing":
+                # 행을 다 읽었으면 검색 구조를 만들고 게시하는 단계다.
+                job["state"] = "indexing"
+                lap("parse")
+            self._save(job)
+
+        try:
+            job["published_as"], job["changes"] = publish_staged(self.books_dir, tmp_path, job["filename"], progress)
+        except ValueError as e:
+            job["state"], job["error"] = "failed", str(e)
+        except Exception as e:
+            job["state"], job["error"] = "failed", f"처리 중 오류: {e}"
+        else:
+            lap("index_publish")
+            job["state"] = "done"
+            if self.on_published:
+                self.on_published()
+                lap("reload")
+        metrics.observe_ingest("total", time.perf_counter() - started)
+        job["finished_at"] = time.time()
+        self._save(job)
+        self._prune()
+
+    def _save(self, job):
+        os.makedirs(self.status_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.status_dir, prefix=".job-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self.status_dir, job["id"] + ".json"))
+
+    def status(self, job_id):
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self.status_dir, job_id + ".json"), encoding="utf-8") as f:
+                updated = os.fstat(f.fileno()).st_mtime
+                job = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if job.get("state") in RUNNING_STATES and updated < time.time() - STALE_JOB_SECONDS:
+            # 적재하던 프로세스가 죽어서 더는 갱신되지 않는 작업이다. 재시작 없이 워커만 바뀐 경우에도
+            # 조회하는 쪽에서 실패로 적어 두어 계속 진행 중으로 보이지 않게 한다.
+            job["state"], job["error"] = "failed", "적재가 중단되었습니다 (서버 재시작 등). 다시 업로드해 주세요."
+            job["finished_at"] = time.time()
+            self._save(job)
+        return job
+
+    def recent(self, n=10):
+        jobs = [self.status(name[:-5]) for name in self._job_files()[:n]]
+        return [job for job in jobs if job]
+
+    def _job_files(self):
+        try:
+            names = [f for f in os.listdir(self.status_dir) if f.endswith(".json")]
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.status_dir, name)), name))
+            except OSError:
+                pass
+        return [name for _, name in sorted(entries, reverse=True)]
+
+    def _prune(self):
+        with self._lock:
+            for name in self._job_files()[KEEP_JOBS:]:
+                try: os.remove(os.path.join(self.status_dir, name))
+                except OSError: pass
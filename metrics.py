@@ -0,0 +1,130 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request, has_request_context
+
+# ===================== 요청 계측 =====================
+# 요청마다 단계별(카탈로그 확인, 매칭, 행 조회, 렌더링 ...) 시간을 재서 히스토그램에 쌓고
+# /metrics 에서 Prometheus 텍스트 형식으로 내보낸다. 한 단계 기록은 perf_counter 두 번과
+# 버킷 이분 탐색 한 번이라 항상 켜 두어도 부담이 없다.
+# 값은 워커 프로세스마다 따로 쌓이므로, 내보낼 때 pid 라벨을 붙여 워커를 구분한다.
+# (--preload 로 fork 된 워커도 구분되도록 pid는 import 시점이 아니라 내보낼 때 읽는다.)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 0이면 느린 요청 로그를 남기지 않는다. 예: SLOW_REQUEST_MS=200
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "0") or 0)
+
+log = logging.getLogger("dodobook.slow")
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets=BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # 라벨 값 튜플 -> [버킷별 개수..., +Inf 개수, 합계]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += seconds
+
+    def render(self, lines, pid):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            base = _labels(("pid",) + self.label_names, (pid,) + labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{base},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+
+REQUEST_SECONDS = Histogram("dodo_request_seconds", "요청 전체 처리 시간", ("route", "method", "status"))
+STAGE_SECONDS = Histogram("dodo_stage_seconds", "요청 안 단계별 처리 시간", ("route", "stage"))
+INGEST_SECONDS = Histogram("dodo_ingest_seconds", "도서 엑셀 적재 단계별 시간", ("stage",))
+HISTOGRAMS = [REQUEST_SECONDS, STAGE_SECONDS, INGEST_SECONDS]
+
+# 스크랩할 때마다 불러서 (이름, 종류, 설명, [(라벨 dict, 값)])를 받는 게이지/카운터 수집기
+_collectors = []
+
+def register_collector(fn):
+    _collectors.append(fn)
+    return fn
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values):
+    return ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+
+def _route():
+    rule = request.url_rule
+    # 매칭 안 된 경로는 라벨 종류가 끝없이 늘지 않도록 하나로 묶는다.
+    return rule.rule if rule is not None else "unmatched"
+
+@contextmanager
+def stage(name):
+    # with stage("match"): ... 로 감싼 구간을 현재 요청의 단계로 기록한다.
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if has_request_context():
+            STAGE_SECONDS.observe((_route(), name), elapsed)
+            stages = g.get("_stages")
+            if stages is not None:
+                stages.append((name, elapsed))
+        else:
+            INGEST_SECONDS.observe((name,), elapsed)
+
+def observe_ingest(name, seconds):
+    INGEST_SECONDS.observe((name,), seconds)
+
+def init_app(app):
+    @app.before_request
+    def _start_timer():
+        g._started = time.perf_counter()
+        g._stages = []
+
+    @app.after_request
+    def _record(resp):
+        started = g.pop("_started", None)
+        if started is None:
+            return resp
+        elapsed = time.perf_counter() - started
+        route = _route()
+        REQUEST_SECONDS.observe((route, request.method, str(resp.status_code)), elapsed)
+        if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+            breakdown = " ".join(f"{name}={sec * 1000:.1f}ms" for name, sec in g.get("_stages", []))
+            # 관리자 비밀번호(pw)가 쿼리에 실려 오므로 로그에는 남기지 않는다.
+            args = "&".join(f"{k}={v}" for k, v in request.args.items(multi=True) if k != "pw")
+            log.warning("slow request %s %s%s %d %.1fms [%s]", request.method, request.path,
+                        "?" + args if args else "", resp.status_code, elapsed * 1000, breakdown)
+        return resp
+
+def render():
+    lines = []
+    pid = str(os.getpid())
+    for histogram in HISTOGRAMS:
+        histogram.render(lines, pid)
+    for collect in _collectors:
+        for name, kind, help_text, samples in collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                labels = dict(pid=pid, **labels)
+                lines.append(f"{name}{{{_labels(labels.keys(), labels.values())}}} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,48 @@
+import re
+from collections import namedtuple
+
+# ===================== 검색어 문법 =====================
+# 띄어 쓴 단어는 모두 들어 있어야 하는 AND 조건이다.
+#   원피스 1            → "원피스"와 "1"이 모두 들어 있는 행
+#   "진격의 거인"        → 따옴표 안은 띄어쓰기까지 그대로 한 구절
+#   저자:오다  위치:12   → 해당 컬럼에서만 찾는다 (저자:"오다 에이치로" 처럼 따옴표도 된다)
+#   isbn:9788912345678  → ISBN 완전 일치 (하이픈 무시, ISBN-10도 13자리로 맞춰 찾는다)
+# 모르는 접두어("Re:제로")는 필드가 아니라 검색어 글자로 본다.
+FIELD_ALIASES = {
+    "제목": "제목", "title": "제목",
+    "저자": "저자", "작가": "저자", "author": "저자",
+    "위치": "위치", "location": "위치",
+    "권수": "최종권수", "최종권수": "최종권수",
+    "isbn": "ISBN",
+}
+
+Clause = namedtuple("Clause", "field text")
+
+_TOKEN = re.compile(r'(?:([^\s:"]+):)?(?:"([^"]*)"?|(\S+))')
+_ISBN_CHARS = re.compile(r"[\s-]")
+
+def parse_query(text):
+    clauses = []
+    for m in _TOKEN.finditer(text):
+        prefix, quoted, bare = m.groups()
+        value = quoted if quoted is not None else bare
+        field = FIELD_ALIASES.get(prefix.lower()) if prefix else None
+        if prefix and field is None:
+            # 필드가 아닌 접두어는 원래 글자 그대로 되돌린다.
+            value = f"{prefix}:{value}"
+        if value and value.strip():
+            clauses.append(Clause(field, value.strip() if field else value))
+    return clauses
+
+def normalize_isbn(value):
+    # 바코드 스캐너 입력("978-89-...")과 엑셀 숫자 셀("9788912345678.0")을 같은 13자리 키로 맞춘다.
+    s = _ISBN_CHARS.sub("", str(value)).upper()
+    if s.endswith(".0"):
+        s = s[:-2]
+    if len(s) == 13 and s.isdigit():
+        return s
+    if len(s) == 10 and s[:9].isdigit() and (s[9].isdigit() or s[9] == "X"):
+        body = "978" + s[:9]
+        check = (10 - sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body)) % 10) % 10
+        return body + str(check)
+    return None
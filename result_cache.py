@@ -0,0 +1,112 @@
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from query import parse_query
+from search_engine import normalize_keyword, MATCH_EXACT, MATCH_PREFIX, MATCH_CHOSEONG, MATCH_SUBSTRING, MATCH_FUZZY
+
+# ===================== 검색 결과 캐시 =====================
+# 인기 제목은 같은 검색이 계속 반복되므로, (정규화한 검색어, 카탈로그 버전) -> 순위대로 정렬된
+# 행 번호를 기억해 두고 페이지는 거기서 잘라 준다. 행 번호는 int64 배열, 일치 종류는 한 바이트씩
+# 담아서 크기를 바이트 예산으로 관리한다. 오래된 항목은 TTL 또는 LRU 순서로 버린다.
+# 다른 버전의 카탈로그로 조회가 들어오면 (다른 워커가 새 워크북을 게시한 경우 포함) 통째로 비운다.
+MATCH_KINDS = (MATCH_EXACT, MATCH_PREFIX, MATCH_CHOSEONG, MATCH_SUBSTRING, MATCH_FUZZY)
+_MATCH_CODES = {kind: code for code, kind in enumerate(MATCH_KINDS)}
+ENTRY_OVERHEAD = 200  # 키·튜플·배열 객체 자체의 대략적인 크기
+
+class ResultCache:
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # 키 -> (만료 시각, 행 번호 배열, 일치 종류 바이트, 크기)
+        self._lock = threading.Lock()
+        self._version = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @staticmethod
+    def key(keyword):
+        # 띄어쓰기·대소문자·따옴표 차이만 있는 검색어는 같은 키가 되도록 조건 단위로 맞춘다.
+        clauses = parse_query(keyword)
+        if not clauses:
+            return (("raw", normalize_keyword(keyword)),)
+        return tuple((c.field, normalize_keyword(c.text)) for c in clauses)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _get(self, version, key):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self.bytes = 0
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _put(self, version, key, matches):
+        rows = array("q", (row for row, _ in matches))
+        kinds = bytes(_MATCH_CODES[match] for _, match in matches)
+        size = ENTRY_OVERHEAD + rows.itemsize * len(rows) + len(kinds) + sum(len(str(part)) for part in key)
+        entry = (time.monotonic() + self.ttl, rows, kinds, size)
+        # 예산의 1/4을 넘는 결과는 담지 않는다 (한 번에 캐시를 다 밀어내지 않도록).
+        if size > self.max_bytes // 4:
+            return entry
+        with self._lock:
+            if version != self._version:
+                return entry
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def _drop(self, key):
+        self.bytes -= self._entries.pop(key)[3]
+
+    def search_page(self, catalog, keyword, offset, limit, with_total=True, fuzzy=True):
+        # SearchIndex.search_page 와 같은 (페이지, 전체 건수, 다음 페이지 유무)를 돌려준다.
+        # 오타 검색을 붙인 결과와 뺀 결과는 따로 담는다 (전 지점 검색은 뺀 쪽을 쓴다).
+        key = (self.key(keyword), fuzzy)
+        entry = self._get(catalog.version, key)
+        if entry is None:
+            if not with_total:
+                # 전체 건수가 필요 없는 요청은 필요한 만큼만 훑고 끝내는 편이 빠르다.
+                return catalog.index.search_page(keyword, offset, limit, False, fuzzy)
+            entry = self._put(catalog.version, key, list(catalog.index.iter_query(keyword, fuzzy)))
+        _, rows, kinds, _ = entry
+        end = min(offset + limit, len(rows))
+        page = [(rows[i], MATCH_KINDS[kinds[i]]) for i in range(offset, end)]
+        return page, len(rows) if with_total else None, offset + limit < len(rows)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "version": self._version,
+        }
@@ -0,0 +1,375 @@
+import bisect
+import heapq
+import threading
+from collections import OrderedDict
+from itertools import islice
+from array import array
+from hangul import decompose_marked, choseong, is_choseong_query, SYLLABLE_MARK
+from query import parse_query, normalize_isbn
+
+SEARCH_COLUMNS = ["제목", "최종권수", "저자", "ISBN", "위치"]
+
+# 행 구분자(SEP)와 필드 구분자(FIELD_SEP)는 엑셀 셀에 들어올 수 없는 제어문자라서
+# 검색어에서 지워 두면 매치가 행/필드 경계를 넘지 않는다.
+SEP = "\x00"
+FIELD_SEP = "\x1f"
+SEP_B = SEP.encode()
+SUGGEST_CACHE_SIZE = 1024
+
+# 순위 검색의 일치 종류 (앞에 올수록 먼저 보여 준다)
+MATCH_EXACT = "exact"
+MATCH_PREFIX = "prefix"
+MATCH_CHOSEONG = "choseong"
+MATCH_SUBSTRING = "substring"
+MATCH_FUZZY = "fuzzy"  # 결과가 없을 때만 나오는 오타 검색 (fuzzy.py)
+
+def normalize_keyword(keyword):
+    return keyword.replace(SEP, "").replace(FIELD_SEP, "").replace(SYLLABLE_MARK, "").lower()
+
+# ===================== 텍스트 블롭 =====================
+# 한 컬럼(또는 가공된 컬럼)의 모든 행을 SEP로 이은 UTF-8 바이트열과 행 시작 오프셋.
+# 부분 문자열 검색은 bytes.find 한 번으로 C 레벨에서 훑고, 매치 위치는 이분 탐색으로 행 번호가 된다.
+# UTF-8은 자기 동기화 인코딩이라 바이트 단위 매치가 글자 경계를 어긋나지 않는다.
+class TextBlob:
+    # data는 bytes 또는 스냅샷의 mmap이고, [begin, end) 구간만 이 블롭이다. starts는 data 기준 절대 위치.
+    def __init__(self, data, starts, begin=0, end=None):
+        self.data = data
+        self.starts = starts
+        self.begin = begin
+        self.end = len(data) if end is None else end
+
+    @classmethod
+    def from_strings(cls, values):
+        encoded = [v.replace(SEP, "").encode("utf-8") for v in values]
+        starts = array("q")
+        pos = 1
+        for b in encoded:
+            starts.append(pos)
+            pos += len(b) + 1
+        return cls(SEP_B + SEP_B.join(encoded) + SEP_B, starts)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def nbytes(self):
+        return (self.end - self.begin) + len(self.starts) * 8
+
+    def __getitem__(self, i):
+        # i번째 행 값. 자동완성처럼 정렬된 블롭은 이걸로 바로 이분 탐색한다.
+        start = self.starts[i]
+        end = self.starts[i + 1] - 1 if i + 1 < len(self.starts) else self.end - 1
+        return self.data[start:end].decode("utf-8")
+
+    def values(self):
+        if not self.starts:
+            return []
+        return bytes(self.data[self.begin + 1:self.end - 1]).decode("utf-8").split(SEP)
+
+    def iter_rows(self, needle):
+        # needle 앞에 SEP를 붙이면 접두 일치, 앞뒤로 붙이면 완전 일치 검색이 된다.
+        data, starts, end = self.data, self.starts, self.end
+        n = len(starts)
+        if not needle:
+            yield from range(n)
+            return
+        if not n:
+            return
+        lead = 1 if needle.startswith(SEP_B) else 0
+        pos = data.find(needle, self.begin, end)
+        while pos != -1:
+            row = bisect.bisect_right(starts, pos + lead) - 1
+            yield row
+            if row + 1 >= n:
+                return
+            # 다음 행의 앞 SEP부터 다시 찾으므로 한 행은 한 번만 나온다.
+            pos = data.find(needle, starts[row + 1] - 1, end)
+
+    def contains(self, i, needle):
+        # iter_rows와 같은 규칙(행 앞뒤 SEP 포함)으로 i번째 행 하나만 본다.
+        start = self.starts[i] - 1
+        end = self.starts[i + 1] if i + 1 < len(self.starts) else self.end
+        return self.data.find(needle, start, end) != -1
+
+class RowSet:
+    # ISBN 해시 결과처럼 미리 찾아 둔 행 목록을 블롭과 같은 방식으로 쓰게 한다.
+    def __init__(self, rows):
+        self.rows = rows
+
+    def iter_rows(self, needle):
+        return iter(self.rows)
+
+    def contains(self, i, needle):
+        return i in self.rows
+
+# ===================== 검색 인덱스 =====================
+# 카탈로그를 읽을 때 한 번 만들어 두고, 검색은 미리 가공해 둔 블롭에서만 한다.
+#   text        : 다섯 컬럼을 소문자로 이어 붙인 행 텍스트 (문자열 그대로 검색)
+#   *_jamo      : 제목/저자를 음절 표시를 붙여 자모로 분해한 형태 (완전/접두/입력 중 음절 일치, hangul.decompose_marked)
+#   *_choseong  : 제목/저자의 초성 열 (초성 검색)
+#   volume/location/isbn : 필드 지정 검색(권수:, 위치:, isbn:)용 소문자 컬럼
+#   isbn_keys/isbn_key_rows : 정규화 ISBN을 정렬한 키와 같은 순서의 행 번호 (ISBN 완전 일치)
+# ISBN 표도 스냅샷에 들어가므로 워커마다 해시를 만들지 않고, 같은 mmap 위에서 이분 탐색한다.
+class SearchIndex:
+    ROW_BLOBS = ("text", "title_jamo", "author_jamo", "title_choseong", "author_choseong",
+                 "volume", "location", "isbn")
+    ISBN_BLOBS = ("isbn_keys", "isbn_key_rows")
+    BLOBS = ROW_BLOBS + ISBN_BLOBS
+
+    def __init__(self, text, title_jamo, author_jamo, title_choseong, author_choseong,
+                 volume, location, isbn, isbn_keys, isbn_key_rows):
+        self.text = text
+        self.title_jamo = title_jamo
+        self.author_jamo = author_jamo
+        self.title_choseong = title_choseong
+        self.author_choseong = author_choseong
+        self.volume = volume
+        self.location = location
+        self.isbn = isbn
+        self.isbn_keys = isbn_keys
+        self.isbn_key_rows = isbn_key_rows
+        self.fuzzy = None  # 카탈로그를 열 때 붙이는 오타 검색 인덱스 (fuzzy.FuzzyIndex)
+
+    @classmethod
+    def from_frame(cls, df):
+        columns = {c: df[c].map(str).str.lower().tolist() for c in SEARCH_COLUMNS}
+        titles, authors = columns["제목"], columns["저자"]
+        isbn = TextBlob.from_strings(columns["ISBN"])
+        return cls(
+            TextBlob.from_strings([FIELD_SEP.join(values) for values in zip(*columns.values())]),
+            TextBlob.from_strings([decompose_marked(t) for t in titles]),
+            TextBlob.from_strings([decompose_marked(a) for a in authors]),
+            TextBlob.from_strings([choseong(t) for t in titles]),
+            TextBlob.from_strings([choseong(a) for a in authors]),
+            TextBlob.from_strings(columns["최종권수"]),
+            TextBlob.from_strings(columns["위치"]),
+            isbn,
+            *cls.isbn_table(isbn),
+        )
+
+    @staticmethod
+    def isbn_table(isbn):
+        # isbn 블롭 -> (정렬된 정규화 ISBN 블롭, 같은 순서의 행 번호 블롭). 게시할 때 한 번 만든다.
+        pairs = sorted((key, row) for row, key in enumerate(map(normalize_isbn, isbn.values())) if key)
+        return (TextBlob.from_strings([key for key, _ in pairs]),
+                TextBlob.from_strings([str(row) for _, row in pairs]))
+
+    def __len__(self):
+        return len(self.text)
+
+    def blobs(self):
+        return {name: getattr(self, name) for name in self.BLOBS}
+
+    def isbn_rows(self, key):
+        # 정렬된 키에서 key 구간을 이분 탐색으로 찾는다. 같은 키의 행 번호는 오름차순이다.
+        keys = self.isbn_keys
+        lo = bisect.bisect_left(keys, key)
+        hi = bisect.bisect_right(keys, key, lo)
+        return [int(self.isbn_key_rows[i]) for i in range(lo, hi)]
+
+    def _tiers(self, q, field):
+        # [(일치 종류, [(블롭, needle), ...]), ...] 를 순위 순서로 만든다.
+        if field in ("최종권수", "위치"):
+            blob = self.volume if field == "최종권수" else self.location
+            value = q.strip().encode("utf-8")
+            return [(MATCH_EXACT, [(blob, SEP_B + value + SEP_B)]),
+                    (MATCH_PREFIX, [(blob, SEP_B + value)])]
+        if field == "ISBN":
+            key = normalize_isbn(q)
+            if key:
+                return [(MATCH_EXACT, [(RowSet(self.isbn_rows(key)), None)])]
+            return [(MATCH_SUBSTRING, [(self.isbn, q.strip().encode("utf-8"))])]
+
+        if field == "제목":
+            jamo_blobs, cho_blobs, text_blobs = [self.title_jamo], [self.title_choseong], []
+        elif field == "저자":
+            jamo_blobs, cho_blobs, text_blobs = [self.author_jamo], [self.author_choseong], []
+        else:
+            jamo_blobs = [self.title_jamo, self.author_jamo]
+            cho_blobs = [self.title_choseong, self.author_choseong]
+            text_blobs = [self.text]
+        jamo = decompose_marked(q).encode("utf-8")
+        cho_query = is_choseong_query(q)
+        tiers = []
+        key = normalize_isbn(q) if field is None else None
+        if key:
+            # 바코드 스캐너로 ISBN을 찍은 경우: 해시로 바로 찾아 맨 앞에 둔다.
+            tiers.append((MATCH_EXACT, [(RowSet(self.isbn_rows(key)), None)]))
+        tiers.append((MATCH_EXACT, [(blob, SEP_B + jamo + SEP_B) for blob in jamo_blobs]))
+        tiers.append((MATCH_PREFIX, [(blob, SEP_B + jamo) for blob in jamo_blobs]))
+        if cho_query:
+            cho = "".join(q.split()).encode("utf-8")
+            tiers.append((MATCH_CHOSEONG, [(blob, cho) for blob in cho_blobs]))
+        substring = [(blob, q.encode("utf-8")) for blob in text_blobs]
+        if not cho_query:
+            substring += [(blob, jamo) for blob in jamo_blobs]
+        tiers.append((MATCH_SUBSTRING, substring))
+        return tiers
+
+    def iter_ranked(self, keyword, field=None, substring=True):
+        # (행 번호, 일치 종류)를 완전 → 접두 → 초성 → 부분 일치 순으로 내놓는다.
+        # 필요한 만큼만 꺼내 쓰면 뒤쪽 단계는 훑지 않는다. substring=False 면 부분 일치 단계는 건너뛴다.
+        q = normalize_keyword(keyword)
+        if not q.strip():
+            if field is None:
+                yield from ((row, MATCH_SUBSTRING) for row in self.text.iter_rows(q.encode("utf-8")))
+            return
+        # 한 단계 안의 블롭 매치는 각각 행 번호 순이므로 병합해도 원래 행 순서를 지킨다.
+        seen = set()
+        for match, sources in self._tiers(q, field):
+            if match == MATCH_SUBSTRING and not substring:
+                continue
+            for row in heapq.merge(*(blob.iter_rows(needle) for blob, needle in sources)):
+                if row not in seen:
+                    seen.add(row)
+                    yield row, match
+
+    def _checker(self, clause):
+        # 행 번호 하나가 조건에 맞는지 보는 함수. 조건마다 블롭을 통째로 훑어 집합을 만드는 대신
+        # 가장 좁은 조건의 후보 행만 이걸로 걸러 교집합을 구한다.
+        sources = [source for _, tier in self._tiers(normalize_keyword(clause.text), clause.field)
+                   for source in tier]
+        # 같은 블롭에서 더 짧은 needle이 들어 있으면 긴 needle(완전/접두 일치)은 확인할 필요가 없다.
+        sources = [(blob, needle) for blob, needle in sources
+                   if needle is None or not any(b is blob and n is not None and n != needle and n in needle
+                                                for b, n in sources)]
+        return lambda row: any(blob.contains(row, needle) for blob, needle in sources)
+
+    @staticmethod
+    def _selectivity(clause):
+        # 후보를 뽑을 조건 고르기: ISBN이 가장 좁고, 나머지는 검색어가 길수록 좁다고 본다.
+        if clause.field == "ISBN" or normalize_isbn(clause.text):
+            return (2, 0)
+        return (1 if clause.field else 0, len(clause.text.encode("utf-8")))
+
+    def iter_query(self, query, fuzzy=True):
+        # 검색어 문법(query.py)으로 나눈 조건들을 AND 로 묶는다.
+        # 가장 좁은 조건의 순위 순서대로 후보를 꺼내고, 나머지 조건은 그 행만 확인하므로
+        # 여러 단어 검색도 한 단어 검색과 거의 같은 비용으로 끝난다.
+        # 하나도 맞지 않으면 오타 검색 결과를 이어서 내놓는다 (fuzzy=False 면 내놓지 않는다).
+        found = False
+        for row, match in self._iter_exact(query):
+            found = True
+            yield row, match
+        if fuzzy and not found:
+            yield from self.fuzzy_matches(query)
+
+    def fuzzy_matches(self, query):
+        # 오타 검색 결과만 [(행 번호, MATCH_FUZZY)]. 후보가 SHORTLIST개로 잘려 있어 목록이 짧다.
+        return list(self.fuzzy.iter_rows(query)) if self.fuzzy is not None else []
+
+    def _iter_exact(self, query):
+        clauses = parse_query(query)
+        if not clauses:
+            yield from self.iter_ranked(query)
+            return
+        lead = max(clauses, key=self._selectivity)
+        checks = [self._checker(c) for c in clauses if c is not lead]
+        if len(clauses) > 1 and all(c.field is None for c in clauses):
+            # 한글 제목은 띄어쓰기가 흔하므로("진격의 거인") 검색어 전체의 완전/접두/초성 일치를 먼저 보여 준다.
+            # 그 뒤에 나머지를 가장 좁은 단어의 순위 순서로 잇되, 검색어 전체로 보면 단어들이 흩어져 들어 있는
+            # 것이므로 부분 일치로 표시한다. 그래야 일치 종류가 뒤로 갈수록 낮아져서 지점별 결과를
+            # 종류 순서로 합칠 수 있다 (Branches.search_page).
+            seen = set()
+            lead_check = self._checker(lead)
+            for row, match in self.iter_ranked(" ".join(c.text for c in clauses), substring=False):
+                if lead_check(row) and all(check(row) for check in checks):
+                    seen.add(row)
+                    yield row, match
+            for row, _ in self.iter_ranked(lead.text, lead.field):
+                if row not in seen and all(check(row) for check in checks):
+                    yield row, MATCH_SUBSTRING
+            return
+        for row, match in self.iter_ranked(lead.text, lead.field):
+            if all(check(row) for check in checks):
+                yield row, match
+
+    def search_page(self, keyword, offset, limit, with_total=True, fuzzy=True):
+        # 한 페이지의 (행 번호, 일치 종류) 목록, 전체 건수, 다음 페이지 유무를 돌려준다.
+        # 전체 건수가 필요 없으면 offset + limit + 1 건을 찾는 즉시 훑기를 멈춘다.
+        ranked = self.iter_query(keyword, fuzzy)
+        if with_total:
+            matches = list(ranked)
+            return matches[offset:offset + limit], len(matches), offset + limit < len(matches)
+        page = list(islice(ranked, offset, offset + limit + 1))
+        return page[:limit], None, len(page) > limit
+
+# ===================== 자동완성 =====================
+# 제목/저자의 고유 값을 자모 분해 키(음절 표시 포함, hangul.decompose_marked)로 정렬해 두고, 접두어는 이분 탐색으로 범위를 찾는다.
+# 초성만 입력한 경우를 위해 초성 키 배열도 따로 둔다. 정렬된 키/항목도 TextBlob이라
+# 스냅샷에 함께 들어가고, 워커들은 같은 mmap 위에서 탐색한다 (항목은 "필드<FIELD_SEP>표시 문자열").
+# 최근 접두어 결과는 LRU에 담는데, 인스턴스가 카탈로그 버전마다 새로 만들어지므로
+# 새 카탈로그가 올라오면 캐시도 함께 버려진다.
+class Autocomplete:
+    BLOBS = ("suggest_jamo_keys", "suggest_jamo_items", "suggest_choseong_keys", "suggest_choseong_items")
+
+    def __init__(self, suggest_jamo_keys, suggest_jamo_items, suggest_choseong_keys, suggest_choseong_items):
+        self._jamo_keys = suggest_jamo_keys
+        self._jamo = suggest_jamo_items
+        self._cho_keys = suggest_choseong_keys
+        self._cho = suggest_choseong_items
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_values(cls, titles, authors, previous=None):
+        # 제목/저자 값의 집합이 이전 카탈로그와 같으면 (권수·위치만 바뀐 업로드) 정렬된 블롭을 그대로 쓴다.
+        entries = {(t.strip(), "제목") for t in titles if t.strip()}
+        entries |= {(a.strip(), "저자") for a in authors if a.strip()}
+        if previous is not None and previous.entries() == entries:
+            return cls(*previous.blobs().values())
+        entries = sorted(entries)
+        items = [f"{field}{FIELD_SEP}{text}" for text, field in entries]
+        lowered = [text.lower() for text, _ in entries]
+        jamo_keys, jamo_items = _sorted_by([decompose_marked(t) for t in lowered], items)
+        cho_keys, cho_items = _sorted_by([choseong(t) for t in lowered], items)
+        return cls(TextBlob.from_strings(jamo_keys), TextBlob.from_strings(jamo_items),
+                   TextBlob.from_strings(cho_keys), TextBlob.from_strings(cho_items))
+
+    def __len__(self):
+        return len(self._jamo_keys)
+
+    def blobs(self):
+        return dict(zip(self.BLOBS, (self._jamo_keys, self._jamo, self._cho_keys, self._cho)))
+
+    def entries(self):
+        pairs = (item.split(FIELD_SEP, 1) for item in self._jamo.values())
+        return {(text, field) for field, text in pairs}
+
+    def suggest(self, prefix, n):
+        cache_key = (prefix, n)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        result = self._lookup(prefix, n)
+        with self._lock:
+            self._cache[cache_key] = result
+            if len(self._cache) > SUGGEST_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+    def _lookup(self, prefix, n):
+        q = normalize_keyword(prefix).strip()
+        if not q:
+            return []
+        if is_choseong_query(q):
+            keys, items, key = self._cho_keys, self._cho, "".join(q.split())
+        else:
+            keys, items, key = self._jamo_keys, self._jamo, decompose_marked(q)
+        result = []
+        i = bisect.bisect_left(keys, key)
+        while i < len(keys) and len(result) < n and keys[i].startswith(key):
+            field, text = items[i].split(FIELD_SEP, 1)
+            result.append({"text": text, "field": field})
+            i += 1
+        return result
+
+def _sorted_by(keys, items):
+    # 튜플 정렬보다 키 문자열만 비교하는 인덱스 정렬이 빠르다.
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return [keys[i] for i in order], [items[i] for i in order]
@@ -0,0 +1,199 @@
+import atexit
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from catalog import file_lock, write_json_atomic
+
+# ===================== 검색 기록 =====================
+# 손님이 찾았는데 없던 책을 알 수 있도록 검색마다 (검색어, 결과 수, 처리 시간, 카탈로그 버전)을
+# 월별 NDJSON 파일(searches-YYYYMM.ndjson)에 덧붙여 남긴다.
+# 요청 스레드는 메모리 링 버퍼(deque)에 넣기만 하고, 디스크 쓰기는 기록 스레드가 FLUSH_SECONDS마다
+# (또는 BATCH개가 모이면) 한 번의 append 로 묶어서 한다. 디스크가 느려 버퍼가 차면 가장 오래된
+# 항목부터 버리고 dropped 로 센다 (검색 응답은 절대 기다리지 않는다).
+# 여러 워커가 같은 파일에 O_APPEND 로 쓰므로 한 묶음은 한 번의 write 로 통째로 들어간다.
+LOG_PREFIX = "searches-"
+STATS_NAME = "stats.json"
+LOCK_NAME = ".lock"
+BUFFER_SIZE = int(os.environ.get("SEARCH_LOG_BUFFER", "10000") or 10000)
+BATCH = 500
+FLUSH_SECONDS = float(os.environ.get("SEARCH_LOG_FLUSH_SECONDS", "2") or 2)
+
+def query_key(keyword):
+    # 대소문자·띄어쓰기 차이만 있는 검색어는 같은 검색어로 센다.
+    return " ".join(keyword.lower().split())
+
+def log_name(ts):
+    return LOG_PREFIX + time.strftime("%Y%m", time.localtime(ts)) + ".ndjson"
+
+class SearchLog:
+    def __init__(self, directory, buffer_size=BUFFER_SIZE, flush_seconds=FLUSH_SECONDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._buffer = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.errors = 0
+        self.stats = QueryStats(directory)
+        atexit.register(self.flush)  # 정상 종료 때 버퍼에 남은 기록을 쓴다
+
+    def record(self, keyword, hits, seconds, version, **extra):
+        # 요청 스레드에서 부른다. 버퍼에 넣고 끝.
+        entry = {"ts": round(time.time(), 3), "q": keyword, "hits": hits,
+                 "ms": round(seconds * 1000, 2), "version": version, **extra}
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(entry)
+            self.recorded += 1
+            pending = len(self._buffer)
+        self._ensure_thread()
+        if pending >= BATCH:
+            self._wake.set()
+
+    def _ensure_thread(self):
+        # gunicorn --preload 로 fork 된 워커에는 마스터의 스레드가 없으므로 pid가 바뀌면 새로 띄운다.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="search-log", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            entries = list(self._buffer)
+            self._buffer.clear()
+        if not entries:
+            return 0
+        # 월이 바뀌는 순간에 걸친 묶음도 항목 시각에 맞는 파일로 나눠 쓴다.
+        batches = {}
+        for entry in entries:
+            batches.setdefault(log_name(entry["ts"]), []).append(
+                json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        try:
+            for name, lines in batches.items():
+                fd = os.open(os.path.join(self.directory, name), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, "".join(lines).encode("utf-8"))
+                finally:
+                    os.close(fd)
+        except OSError:
+            with self._lock:
+                self.errors += 1
+                self.dropped += len(entries)
+            return 0
+        with self._lock:
+            self.written += len(entries)
+            self.flushes += 1
+        return len(entries)
+
+    def counters(self):
+        with self._lock:
+            return {"buffered": len(self._buffer), "recorded": self.recorded, "written": self.written,
+                    "dropped": self.dropped, "flushes": self.flushes, "errors": self.errors}
+
+# ===================== 검색어 집계 =====================
+# 인기 검색어와 결과 없는 검색어는 로그를 처음부터 다시 읽지 않고, 이미 센 위치(파일별 바이트
+# 오프셋)부터 새로 붙은 줄만 읽어 검색어별 누계에 더한다. 누계와 위치는 stats.json 에 같이
+# 저장하므로 어느 워커가 갱신해도 이어서 센다 (갱신은 잠금 파일로 한 번에 하나).
+# 결과 없음은 결과가 0건이었거나, 정확히 맞는 게 없어 오타 검색 결과만 보여 준 경우다.
+class QueryStats:
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, STATS_NAME)
+        self._lock = threading.Lock()
+        self._counts = {}     # 검색어 -> [검색 수, 결과 없음 수, 마지막 시각, 마지막 결과 수]
+        self._positions = {}  # 로그 파일 이름 -> 읽은 바이트 수
+        self._searches = 0
+        self._seen = None     # 마지막으로 읽거나 쓴 stats.json 의 (mtime_ns, size)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        # 다른 워커가 더 앞까지 센 누계를 저장해 두었으면 그걸 받아 온다.
+        seen = self._stat()
+        if seen is None or seen == self._seen:
+            return
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self._counts = data["counts"]
+        self._positions = data["positions"]
+        self._searches = data["searches"]
+        self._seen = seen
+
+    def _consume(self):
+        # 새로 붙은 완전한 줄만 센다 (쓰는 중인 마지막 줄은 다음 번에).
+        changed = False
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith(LOG_PREFIX) and n.endswith(".ndjson"))
+        for name in names:
+            start = self._positions.get(name, 0)
+            with open(os.path.join(self.directory, name), "rb") as f:
+                f.seek(start)
+                data = f.read()
+            end = data.rfind(b"\n") + 1
+            if not end:
+                continue
+            for line in data[:end].splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._add(entry)
+            self._positions[name] = start + end
+            changed = True
+        return changed
+
+    def _add(self, entry):
+        key = query_key(entry.get("q", ""))
+        if not key:
+            return
+        zero = not entry.get("hits") or bool(entry.get("fuzzy"))
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0, 0, 0, 0]
+        counts[0] += 1
+        counts[1] += 1 if zero else 0
+        counts[2] = entry.get("ts", 0)
+        counts[3] = entry.get("hits")
+        self._searches += 1
+
+    def refresh(self):
+        with self._lock, file_lock(os.path.join(self.directory, LOCK_NAME)):
+            self._load()
+            if self._consume():
+                write_json_atomic(self.path, {"counts": self._counts, "positions": self._positions,
+                                               "searches": self._searches})
+                self._seen = self._stat()
+
+    def top(self, n=20):
+        self.refresh()
+        with self._lock:
+            items = list(self._counts.items())
+            searches = self._searches
+        top = heapq.nlargest(n, items, key=lambda item: (item[1][0], item[1][2]))
+        zero = heapq.nlargest(n, (item for item in items if item[1][1]), key=lambda item: (item[1][1], item[1][2]))
+        as_rows = lambda pairs, i: [{"q": q, "count": c[i], "last_at": c[2], "last_hits": c[3]} for q, c in pairs]
+        return {"searches": searches, "queries": len(items), "top": as_rows(top, 0), "zero": as_rows(zero, 1)}
@@ -0,0 +1,101 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ===================== 서빙 설정 =====================
+# 검색은 순수 파이썬 CPU 작업이라 GIL 때문에 한 프로세스 안에서는 스레드를 늘려도 빨라지지 않는다.
+# 그래서 병렬성은 워커 프로세스(CPU 수만큼)로 얻고, 워커 안의 스레드는 느린 클라이언트·파일 전송·
+# keep-alive 연결이 다른 요청을 막지 않을 만큼만 둔다.
+# 워커 안에서도 검색과 카탈로그 적재는 정해진 개수의 실행 슬롯(BoundedExecutor)으로만 돌려서,
+# 무거운 작업이 몰려도 HTTP 스레드를 다 잡아먹지 못하게 하고, 줄이 넘치면 기다리지 않고 503으로 돌려보낸다.
+# 모든 값은 환경변수로 바꿀 수 있다.
+CPU_COUNT = os.cpu_count() or 1
+
+def _env_int(name, default):
+    value = os.environ.get(name, "")
+    return int(value) if value.strip() else default
+
+def worker_count():
+    return max(1, _env_int("WEB_WORKERS", CPU_COUNT))
+
+def thread_count():
+    return max(1, _env_int("WEB_THREADS", 8))
+
+def search_slots():
+    # 동시에 실제로 도는 검색 수. GIL 아래에서는 2개면 한쪽이 I/O를 기다리는 동안 다른 쪽이 돈다.
+    return max(1, _env_int("SEARCH_CONCURRENCY", 2))
+
+def search_queue():
+    # 슬롯을 기다릴 수 있는 검색 수. 이보다 많이 밀리면 바로 503.
+    # 실행 + 대기를 HTTP 스레드 수보다 적게 잡아야 검색이 몰려도 자동완성·정적 파일·관리자 요청을 받을 스레드가 남는다.
+    return max(0, _env_int("SEARCH_QUEUE", thread_count() - search_slots() - 2))
+
+def load_queue():
+    # 첫 카탈로그 적재를 기다릴 수 있는 요청 수 (적재 자체는 한 번에 하나)
+    return max(0, _env_int("CATALOG_LOAD_QUEUE", thread_count() // 2))
+
+def warm_up_enabled(preload):
+    # 시작할 때 카탈로그를 미리 열고 검색 경로를 한 번 돌려 둘지. WARM_UP=1 이면 항상, 0 이면 안 한다.
+    # 정하지 않으면 gunicorn --preload 일 때만 한다 (마스터가 한 번 읽은 스냅샷 페이지를 워커들이 나눠 쓴다).
+    value = os.environ.get("WARM_UP", "").strip()
+    return value == "1" if value else preload
+
+BACKLOG = _env_int("WEB_BACKLOG", 256)  # 아직 받지 않은 연결의 커널 대기열
+CONNECTION_LIMIT = _env_int("WEB_CONNECTIONS", 200)  # 워커 하나가 동시에 들고 있는 연결 수
+KEEPALIVE = _env_int("WEB_KEEPALIVE", 5)  # 초: 검색 화면은 "더 보기"·자동완성을 이어서 부르므로 연결을 잠깐 살려 둔다
+SEARCH_WAIT = float(os.environ.get("SEARCH_WAIT", "0.5") or 0.5)  # 초: 줄에 설 자리를 기다리는 최대 시간
+CATALOG_LOAD_WAIT = float(os.environ.get("CATALOG_LOAD_WAIT", "30") or 30)
+
+class Busy(Exception):
+    # 실행 슬롯과 대기 자리가 모두 찼다. 라우트는 503 + Retry-After 로 응답한다.
+    pass
+
+class BoundedExecutor:
+    def __init__(self, name, workers, queue=0, wait=0):
+        self.name = name
+        self.workers = workers
+        self.queue = queue
+        self.wait = wait
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        # 실행 중 + 대기 중인 작업 수의 상한. 풀 자체의 대기열은 끝이 없어서 여기서 막는다.
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        return self._submit(self.wait, fn, args, kwargs)
+
+    def try_submit(self, fn, *args, **kwargs):
+        # 자리가 없으면 기다리지 않고 바로 Busy. 요청 스레드가 걸어 두기만 하는 백그라운드 작업용.
+        return self._submit(0, fn, args, kwargs)
+
+    def _submit(self, wait, fn, args, kwargs):
+        if not self._slots.acquire(timeout=wait):
+            with self._lock:
+                self.rejected += 1
+            raise Busy(self.name)
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        # 슬롯에서 fn을 돌리고 결과(또는 예외)를 그대로 돌려준다.
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _done(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def stats(self):
+        return {"workers": self.workers, "queue": self.queue, "in_flight": self.in_flight,
+                "completed": self.completed, "rejected": self.rejected}
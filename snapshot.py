@@ -0,0 +1,83 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+import numpy as np
+from search_engine import TextBlob
+
+# ===================== 카탈로그 스냅샷 =====================
+# 정제된 카탈로그와 검색 블롭을 한 파일에 담는 배열 기반 포맷.
+#   [블롭 바이트][행 시작 오프셋 int64] ... [numpy 배열] ... [JSON 푸터][푸터 위치 int64 + MAGIC]
+# 읽을 때는 파일을 mmap만 하고, 각 블롭은 파일 위에서 바로 검색된다.
+# numpy 배열(오타 검색 인덱스)도 8바이트 경계에 그대로 써 두고 mmap 위의 읽기 전용 배열로 연다.
+MAGIC = b"DODOSNP1"
+TRAILER = struct.Struct("<q8s")
+
+class Snapshot:
+    def __init__(self, mm, footer):
+        self._mm = mm
+        self._blobs = footer["blobs"]
+        self.meta = footer["meta"]
+        self.nbytes = len(mm)
+
+    def __contains__(self, name):
+        return name in self._blobs
+
+    def blob(self, name):
+        # TextBlob, 또는 배열로 쓴 항목이면 numpy 배열
+        info = self._blobs[name]
+        if "dtype" in info:
+            return np.frombuffer(self._mm, dtype=info["dtype"], count=info["count"], offset=info["begin"])
+        starts = memoryview(self._mm)[info["starts"]:info["starts"] + 8 * info["rows"]].cast("q")
+        return TextBlob(self._mm, starts, info["begin"], info["end"])
+
+def write_snapshot(path, blobs, meta):
+    # 임시 파일에 다 쓴 뒤 rename 하므로 읽는 쪽은 반쯤 쓰인 스냅샷을 볼 일이 없다.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".snap-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            layout = {}
+            for name, blob in blobs.items():
+                begin = f.tell()
+                if isinstance(blob, np.ndarray):
+                    f.write(np.ascontiguousarray(blob).tobytes())
+                    f.write(b"\0" * (-f.tell() % 8))
+                    layout[name] = {"begin": begin, "dtype": blob.dtype.str, "count": len(blob)}
+                    continue
+                f.write(blob.data[blob.begin:blob.end])
+                f.write(b"\0" * (-f.tell() % 8))
+                starts_at = f.tell()
+                shift = begin - blob.begin
+                f.write(array("q", (s + shift for s in blob.starts)).tobytes())
+                layout[name] = {"begin": begin, "end": begin + blob.end - blob.begin,
+                                "starts": starts_at, "rows": len(blob)}
+            footer_at = f.tell()
+            f.write(json.dumps({"byteorder": sys.byteorder, "meta": meta, "blobs": layout},
+                               ensure_ascii=False).encode("utf-8"))
+            f.write(TRAILER.pack(footer_at, MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+
+def open_snapshot(path):
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError("빈 스냅샷 파일입니다.")
+    if len(mm) < TRAILER.size:
+        raise ValueError("스냅샷 파일이 손상되었습니다.")
+    footer_at, magic = TRAILER.unpack_from(mm, len(mm) - TRAILER.size)
+    if magic != MAGIC or not 0 <= footer_at <= len(mm) - TRAILER.size:
+        raise ValueError("스냅샷 형식이 아닙니다.")
+    footer = json.loads(mm[footer_at:len(mm) - TRAILER.size].decode("utf-8"))
+    if footer.get("byteorder") != sys.byteorder:
+        raise ValueError("다른 바이트 순서로 만든 스냅샷입니다.")
+    return Snapshot(mm, footer)
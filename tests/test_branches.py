@@ -0,0 +1,30 @@
+import io
+import openpyxl
+from branches import Branch, Branches
+from catalog import publish_workbook
+from serving import BoundedExecutor
+
+def publish(books_dir, rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["제목", "최종권수", "저자", "ISBN", "위치"])
+    for title, author in rows:
+        ws.append([title, 1, author, "", 1])
+    data = io.BytesIO()
+    wb.save(data)
+    data.seek(0)
+    publish_workbook(str(books_dir), data, "books.xlsx")
+
+def test_merged_branches_keep_match_order(tmp_path):
+    # 지점마다 결과가 일치 종류 순서여야 지점을 합쳐도 순서가 맞는다.
+    # "진격의 / 거인 작가"는 "진격의"만 보면 완전 일치지만 검색어 전체로는 단어별 일치다.
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    publish(a, [("진격의 거인 외전", "이사야마 하지메"), ("진격의", "거인 작가")])
+    publish(b, [("진격의 거인", "이사야마 하지메")])
+    branches = Branches([Branch("a", "A", str(a)), Branch("b", "B", str(b))], BoundedExecutor("search", 2, 4, 1))
+    page, total, has_more = branches.search_page(branches.select("all"), "진격의 거인", 0, 10)
+    assert [(branch.id, row, match) for branch, _, row, match in page] == [
+        ("b", 0, "exact"), ("a", 0, "prefix"), ("a", 1, "substring")]
+    assert (total, has_more) == (3, False)
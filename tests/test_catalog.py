@@ -0,0 +1,63 @@
+import datetime
+import random
+import pandas as pd
+from catalog import clean_books, clean_int_like, NULL_TOKENS, REQUIRED_COLUMNS
+
+TRIALS = 200
+
+def legacy_clean_books(df):
+    # 셀마다 파이썬 함수를 부르던 예전 구현 (비교 기준)
+    df = df.fillna('')
+    df = df.apply(lambda col: col.map(lambda x: '' if (isinstance(x, str) and x.strip().lower() in NULL_TOKENS) else x))
+    for col in ['최종권수', '위치']:
+        df[col] = df[col].apply(clean_int_like)
+    return df
+
+def random_token(rng):
+    token = rng.choice(NULL_TOKENS + ("NaN", "Null", "NONE"))
+    token = "".join(ch.upper() if rng.random() < 0.3 else ch for ch in token)
+    return rng.choice(["", " ", "\t", "　"]) + token + rng.choice(["", " ", "\n"])
+
+def random_cell(rng):
+    # 빈칸 표시 변형, 정수 모양 숫자/문자열, 실수, 불리언, 날짜, 전각 숫자 등
+    kind = rng.randrange(16)
+    if kind == 0:
+        return None
+    if kind == 1:
+        return float("nan")
+    if kind == 2:
+        return random_token(rng)
+    if kind == 3:
+        return rng.randint(-5, 200)
+    if kind == 4:
+        return float(rng.randint(0, 50)) + rng.choice([0, 0, 0.5, 0.25])
+    if kind == 5:
+        return rng.choice([True, False])
+    if kind == 6:
+        return rng.choice(["12", "12.0", "+007", "-0", "0.000", "12.", " 3 ", "1e3", "12.5", "1_000",
+                           "１２", "inf", "-Infinity", "nan1", ".5", "7.0e0", "99999999999999999999"])
+    if kind == 7:
+        return str(rng.randint(0, 10 ** rng.randint(1, 19)))
+    if kind == 8:
+        return datetime.datetime(2024, rng.randint(1, 12), rng.randint(1, 28))
+    if kind == 9:
+        return rng.choice(["A-3", "만화 12", "완결", "없음 ", "없 음", "nul", "nonee", "a\x00nan", "nan\x00"])
+    if kind == 10:
+        return rng.randint(10 ** 15, 10 ** 20)
+    if kind == 11:
+        return ""
+    return rng.choice(["원피스", "진격의 거인", "오다 에이치로", "9788912345678", "978-89-123", " 나루토 "])
+
+def random_frame(rng, rows):
+    return pd.DataFrame({c: [random_cell(rng) for _ in range(rows)] for c in REQUIRED_COLUMNS},
+                        columns=REQUIRED_COLUMNS, dtype=object)
+
+def test_clean_books_matches_cell_by_cell_version():
+    # 실패하면 재현할 수 있도록 시드와 첫 차이를 알려 준다.
+    for seed in range(TRIALS):
+        rng = random.Random(seed)
+        df = random_frame(rng, rng.choice([0, 1, 2, 5, 30, 200]))
+        try:
+            pd.testing.assert_frame_equal(legacy_clean_books(df), clean_books(df))
+        except AssertionError as e:
+            raise AssertionError(f"seed {seed}: {e}") from None
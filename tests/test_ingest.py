@@ -0,0 +1,33 @@
+import json
+import os
+import time
+from ingest import IngestJobs, STATUS_DIR, STALE_JOB_SECONDS
+
+def write_job(status_dir, job_id, state, age):
+    path = os.path.join(status_dir, job_id + ".json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"id": job_id, "state": state, "error": None, "finished_at": None}, f)
+    past = time.time() - age
+    os.utime(path, (past, past))
+
+def touch(path, age):
+    open(path, "wb").close()
+    past = time.time() - age
+    os.utime(path, (past, past))
+
+def test_startup_sweeps_abandoned_uploads_and_jobs(tmp_path):
+    # 죽은 프로세스가 남긴 것만 치우고, 다른 워커가 지금 처리 중인 것은 그대로 둔다.
+    status_dir = tmp_path / STATUS_DIR
+    status_dir.mkdir()
+    old, fresh = STALE_JOB_SECONDS + 60, 10
+    write_job(status_dir, "dead", "parsing", old)
+    write_job(status_dir, "live", "indexing", fresh)
+    write_job(status_dir, "done", "done", old)
+    touch(tmp_path / ".upload-old.tmp", old)
+    touch(tmp_path / ".upload-new.tmp", fresh)
+
+    jobs = IngestJobs(str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == [STATUS_DIR, ".upload-new.tmp"]
+    assert jobs.status("dead")["state"] == "failed" and jobs.status("dead")["error"]
+    assert jobs.status("live")["state"] == "indexing"
+    assert jobs.status("done")["state"] == "done"
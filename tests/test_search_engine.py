@@ -0,0 +1,46 @@
+import pandas as pd
+from fuzzy import FuzzyIndex
+from search_engine import SearchIndex, Autocomplete
+
+def make_index(titles):
+    n = len(titles)
+    index = SearchIndex.from_frame(pd.DataFrame({
+        "제목": titles, "최종권수": ["1"] * n, "저자": ["이사야마 하지메"] * n, "ISBN": [""] * n, "위치": ["1"] * n,
+    }))
+    index.fuzzy = FuzzyIndex.from_values(index.title_jamo.values(), index.author_jamo.values())
+    return index
+
+def test_spaced_title_ranks_exact_first():
+    # 띄어 쓴 검색어는 단어별 AND 지만, 검색어 전체와 똑같은 제목이 먼저 나와야 한다.
+    index = make_index(["진격의 거인 외전", "진격의 거인 애장판", "진격의 거인"])
+    assert list(index.iter_query("진격의 거인")) == [(2, "exact"), (0, "prefix"), (1, "prefix")]
+
+def test_words_in_any_order_still_match():
+    index = make_index(["진격의 거인 외전", "진격의 거인 애장판", "진격의 거인"])
+    assert [row for row, _ in index.iter_query("외전 진격")] == [0]
+
+def test_complete_syllable_does_not_match_across_syllables():
+    # "상"(ㅅㅏㅇ)이 "천사의"의 ㅅㅏ + ㅇ 에 걸리면 안 된다.
+    index = make_index(["바람 천사의 영웅", "외모지상주의"])
+    assert list(index.iter_query("상")) == [(1, "substring")]
+
+def test_final_consonant_is_not_a_prefix_of_the_next_syllable():
+    index = make_index(["가오리 대모험", "강철의 연금술사"])
+    assert list(index.iter_query("강")) == [(1, "prefix")]
+
+def test_last_syllable_still_matches_while_typing():
+    index = make_index(["가오리 대모험", "원피스"])
+    assert list(index.iter_query("원ㅍ")) == [(1, "prefix")]
+    assert list(index.iter_query("갇")) == []
+    assert [row for row, _ in index.iter_query("가")] == [0]
+
+def test_suggest_does_not_cross_syllables():
+    suggester = Autocomplete.from_values(["가오리 대모험", "강철의 연금술사"], [])
+    assert [s["text"] for s in suggester.suggest("강", 8)] == ["강철의 연금술사"]
+
+def test_one_jamo_typo_reaches_fuzzy_search():
+    # "잉"은 "인"과 받침 하나가 다르다. 앞 음절들이 맞는다고 "거이야기" 같은 접두 일치로 새면 안 된다.
+    index = make_index(["진격의 거인", "거이야기", "가오리 대모험"])
+    assert list(index.iter_query("진격의 거잉")) == [(0, "fuzzy")]
+    matches = dict(index.iter_query("거잉"))
+    assert matches[0] == "fuzzy" and set(matches.values()) == {"fuzzy"}